@@ -1,13 +1,39 @@
+import asyncio
+import itertools
 import json
 import logging
+import os
 import re
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 
 from ACMEFuzzer import ACMEFuzzer
-from AIEngine import AIEngine
-from JSONHandler import JSONHandler
+from ArtifactCompressor import ArtifactCompressor
+from AIEngine import AIEngine, AsyncAIEngine
+from BatchSplitter import BatchSplitter
+from JobMetrics import JobMetrics
+from JSONCodec import JSONCodec
+from JSONHandler import (
+    JSONHandler,
+    PostmanItemStream,
+    RepeatPlaceholders,
+    StreamedItems,
+)
+from JSONRepair import JSONRepair
+from LLMCache import LLMCache
+from LLMReplay import RecordingAIEngine, ReplayAIEngine
+from LLMScheduler import LLMScheduler
 from OpenAPIHandler import OpenAPIHandler
+from PostmanCollection import (
+    JSONArrayWriter,
+    PostmanCollection,
+    PostmanCollectionWriter,
+    VariableIndex,
+)
+from PromptCompactor import PromptCompactor
+from SpecDiff import SpecDiff
 from VTPrompts import VTPrompts
 
 # ==================== Logging Setup ====================
@@ -25,13 +51,43 @@ class ACME:
     def __init__(self, output_dir_):
         self.jsonHandler = JSONHandler()
         self.output_dir = output_dir_
+        self.metrics = JobMetrics()
+        # Upper bound on concurrent LLM requests per job (1 = sequential)
+        self.max_in_flight = max(1, int(os.getenv("ACME_LLM_MAX_IN_FLIGHT", "4")))
+        # "threads" (blocking client in a worker pool) or "async" (AsyncAIEngine)
+        self.llm_backend = os.getenv("ACME_LLM_BACKEND", "threads").lower()
+        # "live", "record" (live + save completions) or "replay" (offline)
+        self.llm_mode = os.getenv("ACME_LLM_MODE", "live").lower()
+        # Pack small endpoints into one prompt up to this many endpoint tokens (0 = off)
+        self.batch_tokens = int(os.getenv("ACME_LLM_BATCH_TOKENS", "0"))
+        self.batch_max_endpoints = int(os.getenv("ACME_LLM_BATCH_MAX_ENDPOINTS", "4"))
+        self.batchSplitter = BatchSplitter()
+        # Stream completions and extract items as they close (threads backend only)
+        self.stream = os.getenv("ACME_LLM_STREAM", "0") == "1"
+        # Send compact JSON projections of the endpoints instead of raw dicts
+        self.compactor = None
+        if os.getenv("ACME_PROMPT_COMPACTION", "0") == "1":
+            self.compactor = PromptCompactor()
+        # "tokenizer" (single-pass JSONRepair) or "legacy" (regex/replace chain)
+        self.json_repair = os.getenv("ACME_JSON_REPAIR", "tokenizer").lower()
+        self.jsonRepair = JSONRepair()
+        self.repeatPlaceholders = RepeatPlaceholders()
+        # Also write allitems.json and pre-postman.json (untagged items)
+        self.keep_intermediate = os.getenv("ACME_KEEP_INTERMEDIATE", "0") == "1"
+        # Also write variable_usage.json (which test cases use each variable)
+        self.variable_report = os.getenv("ACME_VARIABLE_REPORT", "0") == "1"
+        # Define generateLargeRandomString once at collection level instead of
+        # in every item with an oversized payload
+        self.shared_script = os.getenv("ACME_SHARED_SCRIPT", "0") == "1"
+        self.shared_script_used = False
+        # Write environment_variables.json without indentation
+        self.minify = os.getenv("ACME_MINIFY_ARTIFACTS", "0") == "1"
         logger.info(f"Initialized ACME with output_dir: {output_dir_}")
 
-    def ai_vts(self, openapi_file, head_prompt):
+    def ai_vts(self, openapi_file, head_prompt, previous_dir=None):
         vtPrompts = VTPrompts()
-        aiEngine = AIEngine()
         output = ""
-        allvtpm_items = ""
+        allvtpm_items = []
 
         try:
             openAPIHandler = OpenAPIHandler(openapi_file)
@@ -40,113 +96,431 @@ class ACME:
                 f"Found {len(endpoints)} endpoints in OpenAPI file: {openapi_file}"
             )
 
-            prompts = []
-            client = aiEngine.create_ai_cient()
+            # Reuse the artifacts of endpoints unchanged since the previous job
+            specDiff = SpecDiff(previous_dir)
+            reuse = [None] * len(endpoints)
+            if previous_dir:
+                if specDiff.head_prompt == head_prompt:
+                    reuse = specDiff.match(endpoints, "{}.json")
+                else:
+                    logger.info(
+                        "Vulnerability selection differs from the previous job, "
+                        "regenerating all AI test cases"
+                    )
 
-            for an_ep in endpoints:
-                prompts.append(vtPrompts.create_prompt_for_postman(an_ep, head_prompt))
+            aiEngine = self.create_engine()
+            llmCache = LLMCache.from_env()
+
+            # Serve unchanged endpoints from the cache, only prompt the misses
+            outputs = [None] * len(endpoints)
+            cache_keys = [None] * len(endpoints)
+            if llmCache is not None:
+                template = LLMCache.template_hash(
+                    aiEngine.build_messages(
+                        vtPrompts.create_prompt_for_postman("{endpoint}", head_prompt)
+                    )
+                )
+                for i, an_ep in enumerate(endpoints):
+                    if reuse[i] is not None:
+                        continue
+                    cache_keys[i] = LLMCache.make_key(
+                        an_ep,
+                        head_prompt,
+                        aiEngine.AZURE_OPENAI_ENGINE,
+                        aiEngine.temperature,
+                        aiEngine.max_tokens,
+                        "compact" if self.compactor is not None else None,
+                        template,
+                    )
+                    outputs[i] = llmCache.get(cache_keys[i])
+
+            pending = [
+                i
+                for i in range(len(endpoints))
+                if reuse[i] is None and outputs[i] is None
+            ]
+            if self.compactor is not None:
+                self.report_prompt_tokens(endpoints, aiEngine)
+            batches = self.plan_batches(endpoints, pending, aiEngine)
+            prompts = [
+                self.build_prompt(vtPrompts, endpoints, batch, head_prompt)
+                for batch in batches
+            ]
 
-            for i, aprompt in enumerate(prompts):
-                output = aiEngine.generate_with_llm(aprompt, client)
-                if "{" in output and "}" in output:
-                    output = output[output.find("{") : output.rfind("}") + 1]
+            logger.info(
+                f"Generating test cases for {len(pending)} of {len(endpoints)} "
+                f"endpoints ({len(endpoints) - len(pending)} cached or reused) in "
+                f"{len(prompts)} prompts using the '{self.llm_backend}' backend "
+                f"with up to {self.max_in_flight} concurrent LLM requests"
+            )
+            generated = self.generate_outputs(aiEngine, prompts)
+            batch_iter = iter(batches)
+            batch_outputs = {}
+            for i in range(len(endpoints)):
+                if reuse[i] is not None:
+                    self.metrics.incr("endpoints.reused")
+                    with self.metrics.span("process_endpoint", endpoint=i):
+                        onlyitems = self.process_items(
+                            specDiff.read_artifact("{}.json", reuse[i]), i
+                        )
+                    allvtpm_items.extend(onlyitems)
+                    continue
+
+                output = outputs[i]
+                if output is None:
+                    if i not in batch_outputs:
+                        batch = next(batch_iter)
+                        batch_outputs.update(
+                            self.batchSplitter.split(next(generated), batch, endpoints)
+                        )
+                    output = batch_outputs.pop(i)
+                    if output is None:
+                        # Missing from or misattributed in the batched response
+                        self.metrics.incr("batch.regenerated")
+                        prompt = self.build_prompt(
+                            vtPrompts, endpoints, [i], head_prompt
+                        )
+                        output = list(self.generate_outputs(aiEngine, [prompt]))[0]
+                    if isinstance(output, Exception):
+                        logger.error(
+                            f"LLM generation failed for endpoint {i}", exc_info=output
+                        )
+                        continue
                 else:
-                    logger.warning("Invalid Postman file format detected!")
+                    self.metrics.incr("endpoints.cached")
+
+                streamed = isinstance(output, StreamedItems)
+                with self.metrics.span("process_endpoint", endpoint=i):
+                    if streamed:
+                        onlyitems = self.process_streamed(output, i)
+                    else:
+                        onlyitems = self.process_llm_output(output, i)
+                # Only complete completions that yielded test cases are worth
+                # replaying; a cut-off stream is regenerated next time
+                if (
+                    llmCache is not None
+                    and outputs[i] is None
+                    and onlyitems
+                    and (not streamed or output.complete)
+                ):
+                    llmCache.put(
+                        cache_keys[i], output.to_collection() if streamed else output
+                    )
+                allvtpm_items.extend(onlyitems)
+
+            SpecDiff.save_manifest(self.output_dir, endpoints, head_prompt)
+            return allvtpm_items
+
+        except Exception:
+            logger.error("Error in ai_vts()", exc_info=True)
+            return allvtpm_items
 
-                cleaned_items = self.jsonHandler.extract_postman_items(output)
+    def plan_batches(self, endpoints, pending, aiEngine):
+        """
+        Group pending endpoint indexes into prompts. Consecutive endpoints are
+        packed together while their combined size stays within batch_tokens;
+        with batching disabled every endpoint gets its own prompt.
+        """
+        if self.batch_tokens <= 0 or self.batch_max_endpoints <= 1:
+            return [[i] for i in pending]
+
+        batches = []
+        current = []
+        current_tokens = 0
+        for i in pending:
+            tokens = aiEngine.count_tokens(self.endpoint_text(endpoints[i]))
+            if current and (
+                current_tokens + tokens > self.batch_tokens
+                or len(current) >= self.batch_max_endpoints
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+
+        logger.info(f"Packed {len(pending)} endpoints into {len(batches)} prompts")
+        return batches
+
+    def endpoint_text(self, endpoint):
+        """Text of an endpoint as it is interpolated into the prompt."""
+        if self.compactor is not None:
+            return self.compactor.compact_text(endpoint)
+        return str(endpoint)
+
+    def build_prompt(self, vtPrompts, endpoints, batch, head_prompt):
+        """Build the prompt for a batch of endpoint indexes."""
+        if len(batch) == 1:
+            endpoint = endpoints[batch[0]]
+            if self.compactor is not None:
+                endpoint = self.compactor.compact_text(endpoint)
+            return vtPrompts.create_prompt_for_postman(endpoint, head_prompt)
+
+        batch_endpoints = {BatchSplitter.key(i): endpoints[i] for i in batch}
+        if self.compactor is not None:
+            texts, schemas = self.compactor.compact_batch(batch_endpoints)
+            return vtPrompts.create_batch_prompt_for_postman(
+                texts, head_prompt, schemas
+            )
+        return vtPrompts.create_batch_prompt_for_postman(batch_endpoints, head_prompt)
 
+    def report_prompt_tokens(self, endpoints, aiEngine):
+        """
+        Save the raw and compacted endpoint token counts to prompt_tokens.json.
+        """
+        report = []
+        for i, an_ep in enumerate(endpoints):
+            report.append(
+                {
+                    "index": i,
+                    "path": an_ep["path"],
+                    "raw_tokens": aiEngine.count_tokens(str(an_ep)),
+                    "compact_tokens": aiEngine.count_tokens(
+                        self.compactor.compact_text(an_ep)
+                    ),
+                }
+            )
+
+        raw = sum(r["raw_tokens"] for r in report)
+        compact = sum(r["compact_tokens"] for r in report)
+        logger.info(
+            f"Prompt compaction: {raw} -> {compact} endpoint tokens "
+            f"({100 * (raw - compact) // max(raw, 1)}% saved)"
+        )
+        file_path = f"{self.output_dir}prompt_tokens.json"
+        with open(file_path, "w") as f:
+            json.dump(
+                {"raw_tokens": raw, "compact_tokens": compact, "endpoints": report},
+                f,
+                indent=4,
+            )
+
+    def create_engine(self):
+        """Create the AI engine matching the configured LLM mode and backend."""
+        if self.llm_mode == "replay":
+            aiEngine = ReplayAIEngine.from_env()
+            aiEngine.on_usage = self.metrics.add_tokens
+            return aiEngine
+
+        if self.llm_mode == "record":
+            # Recording wraps the blocking client, whatever the backend
+            aiEngine = RecordingAIEngine(os.environ["ACME_LLM_RECORD_DIR"])
+        elif self.llm_backend == "async":
+            aiEngine = AsyncAIEngine(max_in_flight=self.max_in_flight)
+        else:
+            aiEngine = AIEngine()
+
+        # Rate limits and retries are handled by the scheduler, not the client
+        aiEngine.scheduler = LLMScheduler.from_env()
+        aiEngine.max_retries = 0
+        aiEngine.on_usage = self.metrics.add_tokens
+        return aiEngine
+
+    def generate_outputs(self, aiEngine, prompts):
+        """
+        Run the LLM over all prompts concurrently and yield, in prompt order,
+        either the completion text or the exception raised for that prompt.
+        """
+        if not prompts:
+            return
+
+        if isinstance(aiEngine, AsyncAIEngine):
+            with self.metrics.span("llm_requests", prompts=len(prompts)):
+                outputs = asyncio.run(aiEngine.generate_many(prompts))
+            yield from outputs
+            return
+
+        generate = aiEngine.generate_with_llm
+        if self.stream:
+            if self.batch_tokens > 0:
+                logger.warning("Streaming is not used together with batched prompts")
+            else:
+                generate = partial(self.stream_completion, aiEngine)
+
+        def timed_generate(k, aprompt):
+            with self.metrics.span("llm_request", prompt=k):
+                return generate(aprompt, client)
+
+        client = aiEngine.create_ai_cient()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = [
+                executor.submit(timed_generate, k, aprompt)
+                for k, aprompt in enumerate(prompts)
+            ]
+
+            # Consume results in prompt order so {i}.json stays aligned
+            for future in futures:
                 try:
-                    file_path = f"{self.output_dir}{i}.json"
-                    self.jsonHandler.save_string(file_path, cleaned_items)
-                    logger.info(f"Saved cleaned items to {file_path}")
+                    yield future.result()
+                except Exception as e:
+                    yield e
 
-                    onlyitems = self.data_cleaner(cleaned_items, i)
-                    if onlyitems:
-                        allvtpm_items += onlyitems + ","
+    def stream_completion(self, aiEngine, prompt, client):
+        """
+        Stream a completion, repairing and parsing each Postman item as soon
+        as it closes, while the rest of the response is still generated.
+        Items completed before the stream ends are kept, whether the response
+        was cut off at max_tokens or the stream failed.
 
-                except Exception:
-                    logger.error(
-                        "Error while processing individual endpoint", exc_info=True
-                    )
+        :return: StreamedItems
+        :raises Exception: the stream error, if no item was completed
+        """
+        result = StreamedItems()
+        itemStream = PostmanItemStream()
+        try:
+            for chunk in aiEngine.stream_with_llm(prompt, client):
+                for text in itemStream.feed(chunk):
+                    result.texts.append(text)
+                    try:
+                        result.items.append(json.loads(self.repair(text)))
+                    except ValueError:
+                        result.failed.append(text)
+        except Exception as e:
+            if not result.texts:
+                raise
+            result.error = e
+            logger.warning(
+                f"LLM stream failed, keeping {len(result.texts)} completed items",
+                exc_info=e,
+            )
 
-            return allvtpm_items.rstrip(",")
+        result.complete = itemStream.done and result.error is None
+        if not itemStream.done and result.error is None:
+            logger.warning(
+                f"LLM response ended early, keeping {len(result.texts)} "
+                f"completed items"
+            )
+        return result
+
+    def process_streamed(self, result, i):
+        """
+        Save the streamed items of endpoint i as {output_dir}{i}.json and
+        return them; items that did not parse on arrival go through
+        data_cleaner().
+        """
+        self.jsonHandler.save_string(
+            f"{self.output_dir}{i}.json", ",\n".join(result.texts)
+        )
+        self.metrics.incr("stream.items", len(result.texts))
+        items = list(result.items)
+        if result.failed:
+            items.extend(self.data_cleaner(",\n".join(result.failed), i))
+        return items
+
+    def process_llm_output(self, output, i):
+        """
+        Trim a raw LLM completion to its Postman items, save them as
+        {output_dir}{i}.json and return the cleaned items.
+        """
+        if "{" in output and "}" in output:
+            output = output[output.find("{") : output.rfind("}") + 1]
+        else:
+            logger.warning("Invalid Postman file format detected!")
+
+        cleaned_items = self.jsonHandler.extract_postman_items(output)
+        return self.process_items(cleaned_items, i)
+
+    def process_items(self, cleaned_items, i):
+        """
+        Save the Postman items of endpoint i as {output_dir}{i}.json and
+        return them cleaned.
+
+        :return: List of parsed Postman items
+        """
+        try:
+            file_path = f"{self.output_dir}{i}.json"
+            self.jsonHandler.save_string(file_path, cleaned_items)
+            logger.info(f"Saved cleaned items to {file_path}")
+
+            return self.data_cleaner(cleaned_items, i)
 
         except Exception:
-            logger.error("Error in ai_vts()", exc_info=True)
-            return allvtpm_items.rstrip(",")
+            logger.error("Error while processing individual endpoint", exc_info=True)
+            return []
+
+    def repair(self, text):
+        """Apply the configured JSON repair (ACME_JSON_REPAIR) to LLM output."""
+        if self.json_repair == "legacy":
+            return self.jsonHandler.legacy_repair(text)
+        return self.jsonRepair.repair(text)
 
     def data_cleaner(self, input, i):
-        allItems = self.jsonHandler.eliminate_repeat(input)
-        pattern = r'"\s\+'
-        matches = re.finditer(pattern, allItems)
-        temp = allItems
-        for match in matches:
-            exist = self.jsonHandler.find_index_of_plus(
-                allItems, match.start(), match.end()
-            )
-            temp = temp.replace(exist, "")
+        temp = self.repair(input)
 
         try:
-            json.loads("[" + temp + "]")
-            return temp
+            items = json.loads("[" + temp + "]")
+            self.metrics.incr("json_repair.valid")
+            return items
         except Exception:
             logger.error(
                 "Invalid JSON format in test cases. Attempting recovery...",
                 exc_info=False,
             )
             result = self.jsonHandler.parse_item(temp)
-            try:
-                valid = result[0]
-                return json.dumps(valid, indent=4)[1:-1]
-            except Exception:
-                if len(result[1]) > 0:
-                    file_path = f"{self.output_dir}invalid_{i}.json"
-                    self.jsonHandler.save_string(file_path, result[1])
-                    logger.warning(f"Saved invalid items to {file_path}")
+            self.metrics.incr("json_repair.recovered_items", len(result[0]))
+            self.metrics.incr("json_repair.invalid_objects", len(result[1]))
+            self.metrics.incr(
+                "json_repair.recovered" if result[0] else "json_repair.failed"
+            )
+            if len(result[1]) > 0:
+                file_path = f"{self.output_dir}invalid_{i}.json"
+                self.jsonHandler.save_string(file_path, JSONCodec.dumps(result[1]))
+                logger.warning(f"Saved invalid items to {file_path}")
+            if not result[0]:
                 logger.error("Could not fix or recover test cases")
-                return ""
+            return result[0]
+
+    def fuzz_vts(self, openapi_file, previous_dir=None):
+        return list(self.iter_fuzz_items(openapi_file, previous_dir))
 
-    def fuzz_vts(self, openapi_file):
+    def iter_fuzz_items(self, openapi_file, previous_dir=None):
+        """
+        Generate the fuzz test cases endpoint by endpoint, saving each
+        endpoint's items as {output_dir}fuzz_{i}.json.
+
+        :return: Generator of parsed Postman items
+        """
         try:
             openAPIHandler = OpenAPIHandler(openapi_file)
-            endpoints = openAPIHandler.get_endpoints()
-            paths = {p["path"]: p["endpoint"] for p in endpoints}
+            specDiff = SpecDiff(previous_dir)
 
+            # Fuzz per endpoint so unchanged ones can be reused by later jobs;
+            # endpoints are streamed, fuzzing starts with the first operation
             fuzzer = ACMEFuzzer()
-            fuzzer_items = fuzzer.build_collection(paths)
-
-            fuzz_str_items = json.dumps(fuzzer_items, indent=4)
-            index = fuzz_str_items.find("[")
-            if index != -1:
-                fuzz_str_items = fuzz_str_items[index + 1 :].strip()
-
-            index = fuzz_str_items.rindex("]")
-            if index != -1:
-                fuzz_str_items = fuzz_str_items[:index]
-
+            reused = 0
+            for i, p in enumerate(openAPIHandler.iter_endpoints()):
+                j = specDiff.match_one(p, "fuzz_{}.json")
+                if j is not None:
+                    reused += 1
+                    items = JSONCodec.loads(specDiff.read_artifact("fuzz_{}.json", j))
+                else:
+                    items = fuzzer.build_collection({p["path"]: p["endpoint"]})
+                self.jsonHandler.save_string(
+                    f"{self.output_dir}fuzz_{i}.json", JSONCodec.dumps(items)
+                )
+                self.metrics.incr("fuzz.items", len(items))
+                yield from items
+
+            if previous_dir:
+                logger.info(f"Spec diff: reused fuzz test cases of {reused} endpoints")
             logger.info("Fuzz test cases generated successfully")
-            return fuzz_str_items
 
         except Exception:
             logger.error("Error in fuzz_vts()", exc_info=True)
-            return ""
 
     def converto_to_postman(self, items, file_id):
-        postman = (
-            """{
-            "info": {
-            "name": "ACME generated vulnerability test cases !",
-            "_postman_id": \""""
-            + file_id
-            + """\",
-            "description": "***** Disclaimer for AI-Generated Test Cases *****\\n- These vulnerability test cases have been automatically generated by an AI model and are provided as-is.\\n- Users are strongly advised to carefully review and validate them before execution.\\n- The ACME team makes no warranties, express or implied, regarding the accuracy, completeness, or suitability of these test cases.\\n- The ACME team does not accept responsibility for any errors, damages, losses, or failure to meet legal or regulatory requirements arising from their use.\\n- By using these test cases, you acknowledge and agree that all risks and impacts of execution lie solely with you as the user.\\n- No legal claims, actions, or proceedings may be initiated against the ACME team in connection with any loss or damage resulting from the use of these test cases.",
-            "schema": "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"
-        },
-        "item":"""
-            + items
-            + "}"
-        )
-        return postman
+        """
+        Wrap test case items into a Postman collection.
+
+        :param items: List of parsed items (or their JSON array text)
+        :param file_id: Job id, used as the collection id
+        :return: PostmanCollection
+        """
+        if isinstance(items, str):
+            items = JSONCodec.loads(items)
+        return PostmanCollection(file_id, items)
 
     def extract_placeholders(self, text: str) -> list:
         """
@@ -166,103 +540,178 @@ class ACME:
         return matches
 
     def add_pre_request_event(self, item, no):
-        str_item = json.dumps(item)
-        pattern = rf"{re.escape(self.jsonHandler.start_pattern)}(\d+){re.escape(self.jsonHandler.end_pattern)}"
-        matches = list(re.finditer(pattern, str_item))
-        if len(matches) > 0:
-            env_param = {}
-            for i, match in enumerate(matches, start=1):
-                env_param[f"avt{no}{i}"] = match.group(1)
-                str_item = str_item.replace(match.group(0), f"{{{{avt{no}{i}}}}}", 1)
-            event = self.jsonHandler.build_postman_script(env_param)
-            updated_item = json.loads(str_item)
-            updated_item["event"] = event
-            return updated_item
-        else:
-            return item
+        payloads = self.repeatPlaceholders.collect(item, no)
+        if len(payloads) > 0:
+            env_param = {p["variable"]: p["length"] for p in payloads}
+            item["event"] = self.jsonHandler.build_postman_script(
+                env_param, include_function=not self.shared_script
+            )
+            self.shared_script_used = self.shared_script_used or self.shared_script
+        return item
+
+    def collection_event(self):
+        """Collection-level events required by the tagged items, or None."""
+        if self.shared_script_used:
+            return self.jsonHandler.build_shared_script()
+        return None
+
+    def tag_item(self, item, no):
+        """Number a test case and add its pre-request event."""
+        item["name"] = f"VTC {no} - {item['name']}"
+        return self.add_pre_request_event(item, no)
+
+    def build_environment(self, variable):
+        """Environment embedded in the collection for the given variables."""
+        now_utc = datetime.utcnow()
+        # Format as "YYYY-MM-DDTHH:MM:SS.mmmZ"
+        formatted_date = now_utc.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+        a_env = {}
+        a_env["id"] = "env123"
+        a_env["name"] = "ACME_Environment_Variables"
+        a_env["_postman_variable_scope"] = "environment"
+        a_env["_postman_exported_at"] = formatted_date
+        a_env["_postman_exported_using"] = "Postman/10.0.0"
+
+        values = []
+        for e in variable:
+            eval_dict = {}
+            eval_dict["key"] = e
+            eval_dict["value"] = f"Add_value_of_{e}"
+            eval_dict["enabled"] = "true"
+            values.append(eval_dict)
+        a_env["values"] = values
+        return a_env
+
+    def write_collection(self, items, file_id, output_dir):
+        """
+        Tag items and stream them to {output_dir}post-postman.json as they
+        are produced, collecting the environment variables on the way, then
+        write environment_variables.json. Items are serialized once and never
+        held together in memory.
+
+        :param items: Iterable of parsed Postman items
+        :return: Number of test cases written
+        """
+        writer = PostmanCollectionWriter(f"{output_dir}post-postman.json", file_id)
+        intermediates = []
+        if self.keep_intermediate:
+            intermediates = [
+                JSONArrayWriter(f"{output_dir}allitems.json"),
+                PostmanCollectionWriter(f"{output_dir}pre-postman.json", file_id),
+            ]
+
+        # Tagging and writing interleave item by item, each phase is recorded
+        # as one span holding the total of its share
+        tagging = self.metrics.timer("tag_items")
+        writing = self.metrics.timer("write_collection")
+        variableIndex = VariableIndex()
+        no = 1
+        try:
+            for item in items:
+                if intermediates:
+                    with writing:
+                        text = JSONCodec.dumps(item)
+                        for intermediate in intermediates:
+                            intermediate.write(text)
+                if "name" not in item:
+                    continue
+
+                with tagging:
+                    item = self.tag_item(item, no)
+                    variableIndex.add(item, no)
+                with writing:
+                    writer.write(JSONCodec.dumps(item))
+                no += 1
+        finally:
+            with writing:
+                for intermediate in intermediates:
+                    intermediate.close()
+            with self.metrics.span("build_environment"):
+                environments = [
+                    self.build_environment(variableIndex.environment_variables())
+                ]
+            with writing:
+                writer.close(environments, self.collection_event())
+            tagging.record()
+            writing.record()
+
+        with self.metrics.span("save_environment"):
+            self.save_variables(variableIndex, output_dir)
+        return writer.count
+
+    def save_variables(self, variableIndex, fileDir):
+        """Write environment_variables.json (and the usage report if enabled)."""
+        self.save_environment(variableIndex.variables(), fileDir)
+        if self.variable_report:
+            variableIndex.save_usage(f"{fileDir}variable_usage.json")
 
     def tag_testcase(self, postman):
+        """
+        Number the test cases, add their pre-request events and attach the
+        environment of their variables.
+
+        :param postman: PostmanCollection, or collection JSON text
+        :return: The tagged collection, of the same type as postman
+        """
         try:
-            jsonObj = json.loads(postman)
-            items = jsonObj["item"]
+            if isinstance(postman, PostmanCollection):
+                jsonObj = postman
+            else:
+                jsonObj = PostmanCollection.from_dict(JSONCodec.loads(postman))
+            items = jsonObj.item
             updated_items = []
-            variable = []
+            variableIndex = VariableIndex()
             no = 1
             for i in items:
                 if "name" in i:
-                    i["name"] = f"VTC {no} - {i['name']}"
-                    i = self.add_pre_request_event(i, no)
+                    i = self.tag_item(i, no)
+                    variableIndex.add(i, no)
                     updated_items.append(i)
                     no += 1
 
-                aVar = self.extract_placeholders(json.dumps(i))
-                variable.extend(aVar)
-            jsonObj["item"] = updated_items
-            variable = list(set(variable))
-            now_utc = datetime.utcnow()
-            # Format as "YYYY-MM-DDTHH:MM:SS.mmmZ"
-            formatted_date = now_utc.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-
-            a_env = {}
-            a_env["id"] = "env123"
-            a_env["name"] = "ACME_Environment_Variables"
-            a_env["_postman_variable_scope"] = "environment"
-            a_env["_postman_exported_at"] = formatted_date
-            a_env["_postman_exported_using"] = "Postman/10.0.0"
-
-            values = []
-            for e in variable:
-                eval_dict = {}
-                eval_dict["key"] = e
-                eval_dict["value"] = f"Add_value_of_{e}"
-                eval_dict["enabled"] = "true"
-                values.append(eval_dict)
-            a_env["values"] = values
-            envList = []
-            envList.append(a_env)
-            jsonObj["environments"] = envList
-            return json.dumps(jsonObj, separators=(",", ":"))
+            jsonObj.item = updated_items
+            if self.collection_event() is not None:
+                jsonObj.event = self.collection_event()
+            envList = [self.build_environment(variableIndex.environment_variables())]
+            jsonObj.environments = envList
+            if isinstance(postman, PostmanCollection):
+                return jsonObj
+            return jsonObj.to_json()
 
         except Exception as e:
             logger.error("Error in tag_testcase()", exc_info=True)
 
-    def acmeEntry(self, file_id, openapi_file, output_dir, head_prompt):
+    def acmeEntry(
+        self, file_id, openapi_file, output_dir, head_prompt, previous_dir=None
+    ):
         logger.info("Starting ACME test case generation process")
         acme = ACME(f"{output_dir}")
-        jsonHandler = JSONHandler()
+        metrics = acme.metrics
+        metrics.job_id = file_id
         # head_prompt_test = {"API1:2023": "Broken Object Level Authorization"}
 
-        aiItems = acme.ai_vts(openapi_file, head_prompt)
-        fuzzItems = acme.fuzz_vts(openapi_file)
-        if aiItems.endswith(","):
-            aiItems = aiItems[:-1]
-        if fuzzItems.endswith(","):
-            fuzzItems = fuzzItems[:-1]
+        with metrics.span("ai_vts"):
+            aiItems = acme.ai_vts(openapi_file, head_prompt, previous_dir)
 
-        if aiItems != "":
-            allItems = aiItems + "," + fuzzItems
-        else:
-            allItems = fuzzItems
-
-        logger.info("Saving all combined items")
-        file_path = f"{output_dir}allitems.json"
-        jsonHandler.save_string(file_path, allItems)
-
-        logger.info("Generating pre-postman output")
-        file_path = f"{output_dir}pre-postman.json"
-        postman = acme.converto_to_postman(f"[{allItems}]", file_id)
-        jsonHandler.save_string(file_path, postman)
-
-        logger.info("Generating post-postman output with tagged test cases")
-        post_postman = acme.tag_testcase(postman)
-        file_path = f"{output_dir}post-postman.json"
-        jsonHandler.save_string(file_path, post_postman)
+        # Fuzz items are generated while the collection is being written, the
+        # fuzz, tag_items, build/save_environment and write_collection spans
+        # split the time of this stage
+        logger.info("Streaming post-postman output with tagged test cases")
+        fuzzItems = metrics.iter_span(
+            "fuzz", acme.iter_fuzz_items(openapi_file, previous_dir)
+        )
+        acme.write_collection(itertools.chain(aiItems, fuzzItems), file_id, output_dir)
 
-        jsonh = JSONHandler()
-        jObjStr = jsonh.read_string(file_path)
-        jObj = json.loads(jObjStr)
-        acme.ret_env(jObj, output_dir)
+        artifactCompressor = ArtifactCompressor.from_env()
+        if artifactCompressor is not None:
+            with metrics.span("compress_artifacts"):
+                artifactCompressor.compress(
+                    output_dir, ["post-postman.json", "environment_variables.json"]
+                )
 
+        metrics.save(output_dir)
+        metrics.export()
         logger.info("ACME process completed successfully")
 
     # ---------------------------------------------------------
@@ -290,15 +739,13 @@ class ACME:
         return env_data
 
     def ret_env(self, jObj, fileDir):
-        item = jObj["item"]
-        vList = []
-        unique_list = []
-        for aVar in item:
-            envRec = self.extract_postman_variables(json.dumps(aVar))
-            if len(envRec) != 0:
-                vList.extend(envRec)
-                unique_list = list(set(vList))
+        variableIndex = VariableIndex()
+        for no, aVar in enumerate(jObj["item"], 1):
+            variableIndex.add(aVar, no)
+
+        self.save_variables(variableIndex, fileDir)
 
+    def save_environment(self, unique_list, fileDir):
         allVarVal = self.create_postman_environment_file(
             "ACME Environment variables", unique_list
         )
@@ -306,8 +753,11 @@ class ACME:
         file_path = f"{fileDir}environment_variables.json"
 
         # your overwrite logic here
-        with open(file_path, "w") as f:
-            json.dump(allVarVal, f, indent=4)
+        with open(file_path, "w", encoding="utf-8") as f:
+            if self.minify:
+                f.write(JSONCodec.dumps(allVarVal))
+            else:
+                json.dump(allVarVal, f, indent=4)
             print(f"Environment variables file saved at '{file_path}'")
 
     """def acmeScript(self, file_id,openapi_file, output_dir) :
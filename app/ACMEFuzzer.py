@@ -8,12 +8,16 @@ from hypothesis import given, settings
 from hypothesis import strategies as st
 from hypothesis.errors import NonInteractiveExampleWarning
 from hypothesis.strategies import data
+from JSONCodec import JSONCodec
 from OpenAPIHandler import OpenAPIHandler
 
 warnings.filterwarnings("ignore", category=NonInteractiveExampleWarning)
 
 
 class ACMEFuzzer:
+    # Nesting limit of generated bodies, recursive schemas stop here
+    MAX_DEPTH = 5
+
     def __init__(self):
         self.fake = Faker()
         self.openapi = None
@@ -166,14 +170,17 @@ class ACMEFuzzer:
                             if component is not None:
                                 # ---------------------------------------------
 
-                                payload_strategy = self.strategy_from_schema(component)
+                                payload_strategy = self.strategy_from_schema(
+                                    component,
+                                    (details.get("components") or {}).get("schemas"),
+                                )
                                 if payload_strategy is not None:
                                     fuzzed_body = payload_strategy.example()
                                     # =============================================
                                     # fuzzed_body = random.choice(self.fuzz_value(component))
                                     request["body"] = {
                                         "mode": "raw",
-                                        "raw": json.dumps(fuzzed_body),
+                                        "raw": JSONCodec.dumps(fuzzed_body),
                                         "options": {"raw": {"language": "json"}},
                                     }
 
@@ -218,27 +225,52 @@ class ACMEFuzzer:
 
         return postman_items
 
-    def strategy_from_schema(self, schema):
+    def resolve_schema(self, schema, schemas):
+        """
+        Follow a schema's $ref to the named schema of the endpoint components.
+
+        :param schemas: Dict of schema name -> schema (endpoint components)
+        :return: The referenced schema, or schema itself if it has no $ref
+        """
+        seen = set()
+        while isinstance(schema, dict) and "$ref" in schema:
+            name = str(schema["$ref"]).rsplit("/", 1)[-1]
+            if name in seen or name not in (schemas or {}):
+                return None
+            seen.add(name)
+            schema = schemas[name]
+        return schema
+
+    def strategy_from_schema(self, schema, schemas=None, depth=0):
+        """
+        Build a Hypothesis strategy for a schema.
+
+        :param schemas: Named schemas used to resolve $ref (endpoint components)
+        :param depth: Nesting level; recursive schemas stop at MAX_DEPTH
+        :return: The strategy, or None if the schema is unresolved, cyclic or
+                 untyped (the request is then sent without a body)
+        """
+        schema = self.resolve_schema(schema, schemas)
         if not schema or "type" not in schema:
-            raise ValueError("Invalid schema")
+            return None
 
         t = schema["type"]
         if t == "object":
             props = {}
             for k, v in schema.get("properties", {}).items():
-                if v["type"] == "string":
-                    props[k] = st.text()
-                elif v["type"] == "integer":
-                    props[k] = st.integers()
-                elif v["type"] == "boolean":
-                    props[k] = st.booleans()
-                else:
-                    # fallback for unhandled types
+                v = self.resolve_schema(v, schemas)
+                if not v or "type" not in v or depth >= self.MAX_DEPTH:
+                    # fallback for unresolved or untyped properties
                     props[k] = st.none()
+                else:
+                    props[k] = self.strategy_from_schema(v, schemas, depth + 1)
             return st.fixed_dictionaries(props)
 
         elif t == "array":
-            item_strategy = self.strategy_from_schema(schema["items"])
+            items = self.resolve_schema(schema.get("items"), schemas)
+            if not items or "type" not in items or depth >= self.MAX_DEPTH:
+                return st.lists(st.none())
+            item_strategy = self.strategy_from_schema(items, schemas, depth + 1)
             return st.lists(item_strategy)
 
         elif t == "string":
@@ -262,17 +294,14 @@ class ACMEFuzzer:
         # return self.build_collection()
 
     def extract_req_component_schema(self, requested, details):
-        comp = details["components"]
-        if comp:
-            schemas = comp["schemas"]
-            if schemas:
-                keys = list(schemas.keys())
-                req_comp = requested["$ref"]
-                result = req_comp.rsplit("/", 1)[-1]
-                if result in keys:
-                    obj = schemas[result]
-                    return obj
-        return None
+        """
+        Return the request body schema: the referenced component schema, or
+        the inline schema itself.
+        """
+        if "$ref" not in requested:
+            return requested
+        schemas = (details.get("components") or {}).get("schemas")
+        return self.resolve_schema(requested, schemas)
 
 
 # ------------------------------
@@ -1,12 +1,33 @@
+import asyncio
 import os
 
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, AzureOpenAI, DefaultAsyncHttpxClient
+
+try:
+    import tiktoken
+except ImportError:  # optional, token counts fall back to an estimate
+    tiktoken = None
 
 
 class AIEngine:
     def __init__(self):
         load_dotenv()
+        self._load_credentials()
+        self.temperature = 0.7
+        self.max_tokens = 5000
+        # Client-side retries; set to 0 when an LLMScheduler handles retries
+        self.max_retries = 2
+        # Optional LLMScheduler applying rate limits and backoff to every call
+        self.scheduler = None
+        # Optional callback(prompt_tokens, completion_tokens) per completion
+        self.on_usage = None
+
+    def _load_credentials(self):
+        """
+        Read the Azure OpenAI settings. Engines that do not call Azure
+        override this (and _make_client) instead of __init__.
+        """
         self.AZURE_OPENAI_KEY = os.environ["AZURE_OPENAI_KEY"]
         self.AZURE_OPENAI_ENDPOINT = os.environ["AZURE_OPENAI_ENDPOINT"]
         self.AZURE_OPENAI_API_VERSION = os.environ["AZURE_OPENAI_API_VERSION"]
@@ -14,33 +35,178 @@ class AIEngine:
 
     def create_ai_cient(self):
         # Initialize OpenAI client
+        return self._make_client()
+
+    def _make_client(self):
         client = AzureOpenAI(
             api_version=self.AZURE_OPENAI_API_VERSION,
             azure_endpoint=self.AZURE_OPENAI_ENDPOINT,
             api_key=self.AZURE_OPENAI_KEY,
+            max_retries=self.max_retries,
         )
         return client
 
+    @staticmethod
+    def count_tokens(text):
+        """Count (or, without tiktoken, estimate) the tokens of a text."""
+        if tiktoken is not None:
+            return len(tiktoken.get_encoding("cl100k_base").encode(text))
+        return len(text) // 4 + 1
+
+    def estimate_request_tokens(self, prompt):
+        """Tokens a request may consume against the quota: prompt plus max_tokens."""
+        messages = self.build_messages(prompt)
+        return sum(self.count_tokens(m["content"]) for m in messages) + self.max_tokens
+
+    def report_usage(self, prompt, completion, usage=None):
+        """Pass token usage to on_usage, estimating it when the API gave none."""
+        if self.on_usage is None:
+            return
+        if usage is not None:
+            self.on_usage(usage.prompt_tokens, usage.completion_tokens)
+        else:
+            self.on_usage(
+                self.estimate_request_tokens(prompt) - self.max_tokens,
+                self.count_tokens(completion),
+            )
+
+    def build_messages(self, prompt):
+        """Build the chat messages sent for a single test case prompt."""
+        return [
+            {
+                "role": "system",
+                "content": (
+                    "You are a senior security expert specializing in API testing. "
+                    "Your job is to generate rigorous vulnerability test cases for REST APIs, "
+                    "You provide the output in a ready-to-use Postman collection format "
+                ),
+            },
+            {"role": "user", "content": prompt},
+            {
+                "role": "user",
+                "content": "Generate only postman collection without any other description and explaination",
+            },
+        ]
+
     def generate_with_llm(self, prompt, client):
         """Generate text with GPT-4 given a prompt."""
+        if self.scheduler is not None:
+            return self.scheduler.run(
+                self.estimate_request_tokens(prompt),
+                lambda: self._complete(prompt, client),
+            )
+        return self._complete(prompt, client)
+
+    def _complete(self, prompt, client):
         response = client.chat.completions.create(
             model=self.AZURE_OPENAI_ENGINE,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a senior security expert specializing in API testing. "
-                        "Your job is to generate rigorous vulnerability test cases for REST APIs, "
-                        "You provide the output in a ready-to-use Postman collection format "
-                    ),
-                },
-                {"role": "user", "content": prompt},
-                {
-                    "role": "user",
-                    "content": "Generate only postman collection without any other description and explaination",
-                },
-            ],
-            temperature=0.7,
-            max_tokens=5000,
+            messages=self.build_messages(prompt),
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
         )
-        return response.choices[0].message.content.strip()
+        completion = response.choices[0].message.content.strip()
+        self.report_usage(prompt, completion, response.usage)
+        return completion
+
+    def stream_with_llm(self, prompt, client):
+        """Generate text with GPT-4 given a prompt, yielding completion chunks."""
+        if self.scheduler is not None:
+            stream = self.scheduler.run(
+                self.estimate_request_tokens(prompt),
+                lambda: self._open_stream(prompt, client),
+            )
+        else:
+            stream = self._open_stream(prompt, client)
+
+        chunks = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        self.report_usage(prompt, "".join(chunks))
+
+    def _open_stream(self, prompt, client):
+        return client.chat.completions.create(
+            model=self.AZURE_OPENAI_ENGINE,
+            messages=self.build_messages(prompt),
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+        )
+
+
+class AsyncAIEngine(AIEngine):
+    """
+    Asynchronous AIEngine backed by AsyncAzureOpenAI.
+
+    All generations of a job share one client, and therefore one HTTP
+    connection pool, so a single worker process can keep many requests in
+    flight without a thread per request.
+    """
+
+    def __init__(self, transport=None, max_in_flight=8):
+        """
+        :param transport: Optional httpx async transport (e.g. httpx.MockTransport
+                          or a transport bound to a local stub server)
+        :param max_in_flight: Default number of concurrent generations
+        """
+        super().__init__()
+        self.transport = transport
+        self.max_in_flight = max_in_flight
+
+    def _make_client(self):
+        http_client = None
+        if self.transport is not None:
+            http_client = DefaultAsyncHttpxClient(transport=self.transport)
+
+        client = AsyncAzureOpenAI(
+            api_version=self.AZURE_OPENAI_API_VERSION,
+            azure_endpoint=self.AZURE_OPENAI_ENDPOINT,
+            api_key=self.AZURE_OPENAI_KEY,
+            max_retries=self.max_retries,
+            http_client=http_client,
+        )
+        return client
+
+    async def generate_with_llm(self, prompt, client):
+        """Generate text with GPT-4 given a prompt."""
+        if self.scheduler is not None:
+            return await self.scheduler.arun(
+                self.estimate_request_tokens(prompt),
+                lambda: self._complete(prompt, client),
+            )
+        return await self._complete(prompt, client)
+
+    async def _complete(self, prompt, client):
+        response = await client.chat.completions.create(
+            model=self.AZURE_OPENAI_ENGINE,
+            messages=self.build_messages(prompt),
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+        )
+        completion = response.choices[0].message.content.strip()
+        self.report_usage(prompt, completion, response.usage)
+        return completion
+
+    async def generate_many(self, prompts, max_in_flight=None):
+        """
+        Generate completions for all prompts over one shared client.
+
+        :param prompts: List of prompts
+        :param max_in_flight: Maximum concurrent requests (defaults to self.max_in_flight)
+        :return: List in prompt order holding the completion text, or the
+                 exception raised for that prompt
+        """
+        semaphore = asyncio.Semaphore(max_in_flight or self.max_in_flight)
+        client = self.create_ai_cient()
+
+        async def _generate(prompt):
+            async with semaphore:
+                return await self.generate_with_llm(prompt, client)
+
+        try:
+            return await asyncio.gather(
+                *(_generate(p) for p in prompts), return_exceptions=True
+            )
+        finally:
+            await client.close()
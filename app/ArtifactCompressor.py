@@ -0,0 +1,87 @@
+import gzip
+import logging
+import os
+import shutil
+import uuid
+
+try:
+    import zstandard
+except ImportError:  # optional, zstd artifacts are skipped without it
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactCompressor:
+    """
+    Precomputes compressed copies of job artifacts (post-postman.json.gz,
+    post-postman.json.zst, ...) once at job completion, so the download
+    endpoints can serve them without compressing on every request.
+    """
+
+    # Content-Encoding -> file suffix, in order of preference when serving
+    SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+    def __init__(self, encodings, level=None):
+        """
+        :param encodings: Encodings to produce ("gzip", "zstd")
+        :param level: Compression level, or None for the codec default
+        """
+        self.encodings = []
+        for encoding in encodings:
+            if encoding not in self.SUFFIXES:
+                logger.warning(f"Unknown artifact compression '{encoding}' ignored")
+            elif encoding == "zstd" and zstandard is None:
+                logger.warning("zstandard is not installed, skipping zstd artifacts")
+            else:
+                self.encodings.append(encoding)
+        self.level = level
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a compressor from ACME_ARTIFACT_COMPRESSION (comma separated,
+        e.g. "gzip,zstd") and ACME_ARTIFACT_COMPRESSION_LEVEL, or return None
+        if compression is disabled.
+        """
+        value = os.getenv("ACME_ARTIFACT_COMPRESSION", "")
+        encodings = [e.strip().lower() for e in value.split(",") if e.strip()]
+        if not encodings:
+            return None
+        level = os.getenv("ACME_ARTIFACT_COMPRESSION_LEVEL")
+        return cls(encodings, int(level) if level else None)
+
+    def compress_file(self, file_path, encoding):
+        """Write file_path + suffix atomically and return its path."""
+        target = file_path + self.SUFFIXES[encoding]
+        tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+        with open(file_path, "rb") as src, open(tmp_path, "wb") as dst:
+            if encoding == "gzip":
+                level = 6 if self.level is None else self.level
+                # mtime=0 keeps the output (and its ETag) reproducible
+                with gzip.GzipFile(
+                    fileobj=dst, mode="wb", compresslevel=level, mtime=0
+                ) as gz:
+                    shutil.copyfileobj(src, gz, 1024 * 1024)
+            else:
+                level = 10 if self.level is None else self.level
+                zstandard.ZstdCompressor(level=level).copy_stream(src, dst)
+        os.replace(tmp_path, target)
+        return target
+
+    def compress(self, output_dir, filenames):
+        """
+        Compress the given artifacts of a job directory with every configured
+        encoding. Missing artifacts are skipped.
+        """
+        for filename in filenames:
+            file_path = os.path.join(output_dir, filename)
+            if not os.path.isfile(file_path):
+                continue
+            size = os.path.getsize(file_path)
+            for encoding in self.encodings:
+                target = self.compress_file(file_path, encoding)
+                logger.info(
+                    f"Compressed {filename} with {encoding}: "
+                    f"{size} -> {os.path.getsize(target)} bytes"
+                )
@@ -0,0 +1,168 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSplitter:
+    """
+    Splits the response of a batched prompt back into one completion per
+    endpoint.
+
+    A batched prompt asks the model for a JSON object keyed by ACME_EP_{i},
+    one key per endpoint. The keys are echoed back in free-form model text,
+    so each segment is checked against the routes of the batch before it is
+    attributed: the method and URL of its requests are matched against the
+    OpenAPI path templates. A segment that does not address its own endpoint
+    is rejected, and the endpoint is regenerated on its own.
+    """
+
+    # "method" values and request URLs (plain or url.raw) of Postman items
+    REQUEST_FIELD = re.compile(
+        r'"method"\s*:\s*"([A-Za-z]+)"'
+        r'|"url"\s*:\s*(?:\{\s*"raw"\s*:\s*)?"((?:[^"\\]|\\.)*)"'
+    )
+
+    @staticmethod
+    def key(i):
+        """Key of endpoint i in a batched prompt and its response."""
+        return f"ACME_EP_{i}"
+
+    def split(self, output, batch, endpoints):
+        """
+        Split the keyed response of a batched prompt.
+
+        :param output: Completion text, or the exception of a failed prompt
+        :param batch: Endpoint indexes of the prompt
+        :param endpoints: All endpoints ({"path": "METHOD: url", ...})
+        :return: Dict of endpoint index -> completion text, the exception of
+                 a failed prompt, or None for endpoints missing from the
+                 response or given another endpoint's test cases (to be
+                 regenerated on their own)
+        """
+        if isinstance(output, Exception) or len(batch) == 1:
+            return {i: output for i in batch}
+
+        keys = {self.key(i): i for i in batch}
+        pattern = r'"(' + "|".join(re.escape(k) for k in keys) + r')"\s*:'
+        matches = list(re.finditer(pattern, output))
+
+        split = {}
+        for n, match in enumerate(matches):
+            end = matches[n + 1].start() if n + 1 < len(matches) else len(output)
+            split.setdefault(keys[match.group(1)], output[match.end() : end])
+
+        routes = {i: self.endpoint_route(endpoints[i]) for i in batch}
+        base_length = len(
+            self.base_path([self.endpoint_route(e)[1] for e in endpoints])
+        )
+        for i in batch:
+            if i not in split:
+                logger.warning(
+                    f"Endpoint {i} is missing from the batched LLM response, "
+                    f"regenerating it alone"
+                )
+                split[i] = None
+            elif not self.segment_matches(split[i], i, routes, base_length):
+                logger.warning(
+                    f"Batched LLM output for endpoint {i} targets another "
+                    f"endpoint, regenerating it alone"
+                )
+                split[i] = None
+        return split
+
+    def segment_matches(self, segment, i, routes, base_length=0):
+        """
+        Check that a segment of a batched response holds endpoint i's test
+        cases: at least one request addresses endpoint i, and none addresses
+        another endpoint of the batch more specifically. Requests matching
+        no endpoint of the batch (e.g. tampered URLs) are ignored, and so are
+        ties between endpoints.
+
+        :param routes: Dict of endpoint index -> endpoint_route() of the batch
+        :param base_length: Number of leading template segments that belong
+                            to the base URL (see base_path)
+        """
+        own = other = 0
+        for method, url in self.segment_requests(segment):
+            segments = self.path_segments(url)
+            scores = {
+                j: self.route_score(segments, template, base_length)
+                for j, (route_method, template) in routes.items()
+                if route_method == method
+            }
+            best = max(scores.values(), default=0)
+            if not best:
+                continue
+            if scores.get(i) == best:
+                own += 1
+            else:
+                other += 1
+        return own > 0 and other == 0
+
+    def segment_requests(self, segment):
+        """Return the (METHOD, url) pairs of the requests in LLM output."""
+        requests = []
+        method = url = None
+        for match in self.REQUEST_FIELD.finditer(segment):
+            if match.group(1) is not None:
+                method = match.group(1).upper()
+            else:
+                url = match.group(2)
+            if method is not None and url is not None:
+                requests.append((method, url))
+                method = url = None
+        return requests
+
+    def endpoint_route(self, endpoint):
+        """Return (METHOD, path segments) of an endpoint ("METHOD: url")."""
+        method, url = endpoint["path"].split(":", 1)
+        return method.strip().upper(), self.path_segments(url.strip())
+
+    @staticmethod
+    def path_segments(url):
+        """Path segments of a URL, without scheme, host, query and fragment."""
+        url = url.split("?", 1)[0].split("#", 1)[0]
+        if "://" in url:
+            url = url.split("://", 1)[1].partition("/")[2]
+        return [segment for segment in url.split("/") if segment]
+
+    @staticmethod
+    def base_path(templates):
+        """
+        Literal leading segments shared by all path templates: the path of
+        the server URL, which a {{baseUrl}} variable stands for.
+        """
+        prefix = []
+        for segments in zip(*templates):
+            if len(set(segments)) != 1 or segments[0].startswith("{"):
+                break
+            prefix.append(segments[0])
+        return prefix
+
+    @staticmethod
+    def route_score(segments, template, base_length=0):
+        """
+        Match request path segments against an OpenAPI path template,
+        comparing from the end: a leading {{variable}} stands for the base
+        URL (the first base_length template segments), and extra leading
+        segments are taken as part of the base URL. Template parameters
+        match any segment.
+
+        :return: 0 if they do not match, else how specific the match is:
+                 longer templates score higher, and on equal length literal
+                 segments beat parameters (/users/me over /users/{id})
+        """
+        base = bool(segments) and segments[0].startswith("{{")
+        if base:
+            segments = segments[1:]
+        if len(segments) < len(template) - (base_length if base else 0):
+            return 0
+        literals = 0
+        for segment, expected in zip(reversed(segments), reversed(template)):
+            if expected.startswith("{"):
+                continue
+            if segment != expected:
+                return 0
+            literals += 1
+        return 2 * len(template) + literals + 1
@@ -8,6 +8,7 @@ from datetime import datetime
 
 from ACME import ACME
 from JSONHandler import JSONHandler
+from PostmanCollection import VariableIndex
 
 
 def cmd_gt(args):
@@ -42,8 +43,15 @@ def cmd_gt(args):
     print(uuid_value)
     output_dir = f"{args.output}{uuid_value}/"
     os.makedirs(output_dir, exist_ok=True)
+    previous_dir = None
+    if args.previous:
+        if not os.path.isdir(args.previous):
+            print(f"❌ Previous job directory does not exist: {args.previous} !")
+            return
+        previous_dir = os.path.join(args.previous, "")
+
     acme = ACME(args.output)
-    acme.acmeEntry(uuid_value, args.file, output_dir, head_prompt)
+    acme.acmeEntry(uuid_value, args.file, output_dir, head_prompt, previous_dir)
 
 
 def cmd_run(args):
@@ -79,6 +87,12 @@ def build_cli():
     gt_parser.add_argument(
         "-o", "--output", required=True, help="Output Testcases file"
     )
+    gt_parser.add_argument(
+        "-p",
+        "--previous",
+        required=False,
+        help="Output directory of a previous job to reuse unchanged endpoints from",
+    )
     gt_parser.set_defaults(func=cmd_gt)
 
     # --- RUN COMMAND ---
@@ -147,13 +161,10 @@ def create_postman_environment_file(env_name, unique_list):
 
 
 def ret_env(jObj, fileDir):
-    item = jObj["item"]
-    vList = []
-    for aVar in item:
-        envRec = extract_postman_variables(json.dumps(aVar))
-        if len(envRec) != 0:
-            vList.extend(envRec)
-    unique_list = list(set(vList))
+    variableIndex = VariableIndex()
+    for no, aVar in enumerate(jObj["item"], 1):
+        variableIndex.add(aVar, no)
+    unique_list = variableIndex.variables()
 
     allVarVal = create_postman_environment_file(
         "ACME Environment variables", unique_list
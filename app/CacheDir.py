@@ -0,0 +1,68 @@
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CacheDir:
+    """
+    Housekeeping shared by the on-disk caches (one file per entry, the
+    modification time doubling as the last access time).
+
+    Eviction walks the whole directory, so caches run it periodically
+    (evict_due) rather than on every write.
+    """
+
+    MARKER = ".last_eviction"
+
+    @classmethod
+    def evict_due(cls, cache_dir, interval):
+        """
+        Return True at most once per interval seconds (across processes) and
+        mark the eviction as done.
+
+        :param interval: Seconds between evictions; 0 evicts on every call
+        """
+        marker = os.path.join(cache_dir, cls.MARKER)
+        try:
+            if time.time() - os.path.getmtime(marker) < interval:
+                return False
+        except FileNotFoundError:
+            pass
+        with open(marker, "a"):
+            pass
+        os.utime(marker)
+        return True
+
+    @staticmethod
+    def evict(cache_dir, suffix, max_entries, ttl=None):
+        """
+        Drop expired entries, then the least recently used beyond max_entries.
+
+        :param suffix: File name suffix of the entries (e.g. ".txt")
+        :param ttl: Entry lifetime in seconds since last access, or None
+        :return: (number of expired entries, number of LRU entries) removed
+        """
+        now = time.time()
+        entries = []
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(suffix):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+
+        entries.sort()
+        expired = [p for mtime, p in entries if ttl is not None and now - mtime > ttl]
+        live = len(entries) - len(expired)
+        overflow = [p for _, p in entries[len(expired) :]][: max(0, live - max_entries)]
+
+        for path in expired + overflow:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(expired), len(overflow)
@@ -1,6 +1,7 @@
 import json
 
 import networkx as nx
+from SpecLoader import SpecLoader
 
 TOKEN_FIELD_NAMES = {
     "token",
@@ -16,8 +17,7 @@ ID_LIKE_SUFFIXES = ("id", "_id", "uuid", "_uuid")
 
 
 def load_spec(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return SpecLoader().load(path)
 
 
 def node_id(method, path):
@@ -3,8 +3,8 @@ import os
 from collections import defaultdict
 
 import networkx as nx
-import yaml
 from pyvis.network import Network
+from SpecLoader import SpecLoader
 
 
 class OpenAPIDependencyInferer:
@@ -18,12 +18,7 @@ class OpenAPIDependencyInferer:
         self._parse_openapi()
 
     def _load_openapi(self):
-        with open(self.openapi_file, "r", encoding="utf-8") as f:
-            raw = f.read()
-        try:
-            return json.loads(raw)
-        except Exception:
-            return yaml.safe_load(raw)
+        return SpecLoader().load(self.openapi_file)
 
     def _resolve_ref(self, ref: str):
         if not ref.startswith("#/"):
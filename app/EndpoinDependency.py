@@ -1,4 +1,4 @@
-import json
+from SpecLoader import SpecLoader
 
 # Ultra-complete CRUD / operation order
 crud_order = [
@@ -158,8 +158,7 @@ def extract_dependencies(endpoint):
 
 
 def generate_execution_sequence(openapi_file):
-    with open(openapi_file) as f:
-        spec = json.load(f)
+    spec = SpecLoader().load(openapi_file)
 
     endpoints = []
     produced_keys = set()  # Keep track of IDs that have been produced
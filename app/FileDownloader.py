@@ -3,6 +3,8 @@ import logging
 import os
 import re
 
+from ArtifactCompressor import ArtifactCompressor
+
 
 class FileDownloader:
     def __init__(self, BASE_DIR):
@@ -77,6 +79,26 @@ class FileDownloader:
         logging.info(f"Serving file: {file_path}")
         return file_path
 
+    def negotiate_encoding(self, file_path, accept_encodings):
+        """
+        Pick the precomputed compressed copy of an artifact (see
+        ArtifactCompressor) that the client accepts.
+
+        :param file_path: Path of the uncompressed artifact
+        :param accept_encodings: Parsed Accept-Encoding header
+                                 (werkzeug Accept, e.g. request.accept_encodings)
+        :return: (path to serve, Content-Encoding or None)
+        """
+        mtime = os.path.getmtime(file_path)
+        for encoding, suffix in ArtifactCompressor.SUFFIXES.items():
+            if accept_encodings.quality(encoding) <= 0:
+                continue
+            encoded_path = file_path + suffix
+            # A copy older than the artifact is stale, e.g. after a rerun
+            if os.path.isfile(encoded_path) and os.path.getmtime(encoded_path) >= mtime:
+                return encoded_path, encoding
+        return file_path, None
+
 
 """
 @app.get("/pm/<uuid_value>")
@@ -1,7 +1,6 @@
-import json
 import os
 
-import yaml
+from SpecLoader import SpecLoader
 
 AZURE_OPENAI_KEY = os.environ["AZURE_OPENAI_KEY"]
 AZURE_OPENAI_ENDPOINT = os.environ["AZURE_OPENAI_ENDPOINT"]
@@ -27,11 +26,7 @@ OWASP Top 10:
 
 def load_openapi(file_path):
     """Load OpenAPI spec from YAML or JSON file."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        if file_path.endswith((".yaml", ".yml")):
-            return yaml.safe_load(f)
-        else:
-            return json.load(f)
+    return SpecLoader().load(file_path)
 
 
 def extract_endpoints(openapi_spec):
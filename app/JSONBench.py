@@ -0,0 +1,436 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import time
+
+from JSONHandler import JSONHandler
+from JSONRepair import JSONRepair
+
+logger = logging.getLogger(__name__)
+
+
+class JSONBench:
+    """
+    Benchmark of the JSON recovery pipeline on malformed LLM Postman output.
+
+    Every document goes through the same steps as ACME.process_llm_output()
+    and ACME.data_cleaner(): trimming to the item array, repair (legacy
+    regex/replace chain or JSONRepair), a direct parse and, if that fails,
+    JSONHandler.parse_item(). Objects parse_item() rejects are offered to
+    fix_json_string() and rescue_parse_list() to measure how often those
+    fallbacks would rescue them.
+
+    Reported per pipeline: throughput (MB/s of raw completion), recovered
+    item ratio and the fallback-path hit counts of JSONHandler. compare()
+    tells, document by document, whether the tokenizer recovers the same
+    items as the legacy chain; scaling() times both on documents with a
+    growing number of .repeat() payloads.
+    """
+
+    SIZES = [1024, 10 * 1024, 100 * 1024, 1024 * 1024, 5 * 1024 * 1024]
+    # Outputs a past change failed on: (name, completion, recoverable items)
+    REGRESSIONS = [
+        (
+            "regression-unbalanced-quote",
+            '{"name": "abc}, {"name": "ok1"}, {"name": "ok2"}',
+            2,
+        ),
+        (
+            "regression-sqli-payload",
+            '{"name": "sqli", "request": {"method": "POST", "body": {"mode": '
+            '"raw", "raw": "{"username": "admin" OR 1=1 --"}"}}},\n'
+            '{"name": "ok1", "request": {"method": "GET"}},\n{"name": "ok2"}',
+            2,
+        ),
+        (
+            "regression-identifier-concat",
+            '{"name": "concat", "request": {"method": "GET", "url": {"raw": '
+            '"{{baseUrl}}/users/" + userId + "/orders"}}},\n'
+            '{"name": "ok", "request": {"method": "GET", "url": {"raw": '
+            '"{{baseUrl}}/users/" + "1"}}}',
+            2,
+        ),
+    ]
+    PIPELINES = ["legacy", "tokenizer"]
+
+    def __init__(self, seed=7, max_legacy_bytes=1024 * 1024):
+        """
+        :param seed: Seed of the synthetic corpus
+        :param max_legacy_bytes: Larger documents skip the (quadratic) legacy
+                                 pipeline
+        """
+        self.seed = seed
+        self.max_legacy_bytes = max_legacy_bytes
+
+    # ------------------------------------------------------------------
+    # Corpus
+    # ------------------------------------------------------------------
+    def _item(self, rnd, k):
+        """Return (item text, True if the pipeline should recover it)."""
+        kind = rnd.choice(["clean", "repeat", "concat", "brace", "trailing", "broken"])
+        name = f"VT {k} {kind}"
+        filler = "x" * rnd.randint(50, 1500)
+        if kind == "repeat":
+            body = f'"" + "A".repeat({rnd.randint(1000, 100000)}) + ""'
+        elif kind == "brace":
+            name += " {payload}"
+            body = '"{\\"q\\": \\"}{\\"}"'
+        else:
+            body = f'"{filler}"'
+        url = '"{{baseUrl}}/users/{{user_id}}"'
+        if kind == "concat":
+            url = '"{{baseUrl}}/users/" + "' + str(k) + '"'
+        header = '[{"key": "Authorization", "value": "Bearer {{auth_token}}"}]'
+        if kind == "trailing":
+            header = '[{"key": "Authorization", "value": "Bearer {{auth_token}}"},]'
+        method = '"POST"' if kind != "broken" else "POST"
+        item = (
+            f'{{"name": "{name}", "request": {{"method": {method}, '
+            f'"header": {header}, "url": {{"raw": {url}}}, '
+            f'"body": {{"mode": "raw", "raw": {body}}}}}}}'
+        )
+        return item, kind != "broken"
+
+    def synthetic_document(self, size, truncate=False):
+        """
+        Build a completion of about size bytes.
+
+        :param truncate: Cut the completion inside its last items, as a
+                         max_tokens limit would
+        :return: (completion text, number of recoverable items)
+        """
+        rnd = random.Random(f"{self.seed}-{size}-{truncate}")
+        head = (
+            'Here is the collection:\n```json\n{"info": {"name": "ACME"}, "item": [\n'
+        )
+        tail = "\n]}\n```"
+        items = []
+        ends = []
+        length = len(head)
+        k = 0
+        while length < size or not items:
+            item, ok = self._item(rnd, k)
+            items.append(item)
+            length += len(item) + 2
+            ends.append((length, ok))
+            k += 1
+
+        text = head + ",\n".join(items) + tail
+        cut = len(text)
+        if truncate:
+            cut = int(len(text) * 0.97)
+            text = text[:cut]
+        expected = sum(1 for end, ok in ends if ok and end <= cut)
+        return text, expected
+
+    def synthetic_corpus(self):
+        corpus = []
+        for size in self.SIZES:
+            for truncate in (False, True):
+                text, expected = self.synthetic_document(size, truncate)
+                name = f"synthetic-{size // 1024}KB{'-truncated' if truncate else ''}"
+                corpus.append({"name": name, "text": text, "expected": expected})
+        return corpus
+
+    def regression_corpus(self):
+        return [
+            {"name": name, "text": text, "expected": expected}
+            for name, text, expected in self.REGRESSIONS
+        ]
+
+    def recorded_corpus(self, corpus_dir):
+        """
+        Load recorded documents: LLMReplay recordings ({"completion": ...})
+        and {i}.json item files saved by ACME.
+
+        The expected item count of a recorded document is the number of
+        top-level objects in its item array.
+        """
+        jsonHandler = JSONHandler()
+        corpus = []
+        for root, _, files in os.walk(corpus_dir):
+            for name in sorted(files):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                text = jsonHandler.read_string(path)
+                try:
+                    text = json.loads(text)["completion"]
+                except Exception:
+                    pass
+                expected = len(jsonHandler.extract_json_objects(self.trim(text)))
+                corpus.append({"name": path, "text": text, "expected": expected})
+        return corpus
+
+    def repeat_document(self, count):
+        """Build count items, each with a distinct .repeat() payload."""
+        item = (
+            '{"name": "n%d", "request": {"url": {"raw": "{{baseUrl}}/a/" + "%d"}, '
+            '"body": {"raw": "" + "A".repeat(%d) + ""}}}'
+        )
+        return ",\n".join(item % (k, k, 1000 + k) for k in range(count))
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+    def trim(self, text):
+        """Cut a completion down to its items, as ACME.process_llm_output()."""
+        if '"item"' not in text:
+            return text
+        if "{" in text and "}" in text:
+            text = text[text.find("{") : text.rfind("}") + 1]
+        return JSONHandler().extract_postman_items(text)
+
+    def recover(self, pipeline, jsonHandler, jsonRepair, text):
+        """
+        Run one document through a pipeline.
+
+        :return: (recovered items, objects parse_item() rejected)
+        """
+        items = self.trim(text)
+        if pipeline == "legacy":
+            repaired = jsonHandler.legacy_repair(items)
+        else:
+            repaired = jsonRepair.repair(items)
+
+        try:
+            return json.loads("[" + repaired + "]"), []
+        except Exception:
+            jsonHandler.count_fallback("data_cleaner.parse_item")
+        return jsonHandler.parse_item(repaired)
+
+    def rescue(self, jsonHandler, invalid):
+        """Offer rejected objects to the remaining JSONHandler fallbacks."""
+        rescued = 0
+        for entry in invalid:
+            obj = entry["object"]
+            if jsonHandler.fix_json_string(obj) is not None:
+                rescued += 1
+            elif jsonHandler.rescue_parse_list(obj):
+                rescued += 1
+        return rescued
+
+    def run(self, corpus, pipelines=None):
+        """
+        Benchmark the pipelines on a corpus.
+
+        :param corpus: List of {"name", "text", "expected"} documents
+        :return: Dict of pipeline -> results
+        """
+        results = {}
+        for pipeline in pipelines or self.PIPELINES:
+            jsonHandler = JSONHandler()
+            jsonRepair = JSONRepair()
+            documents = []
+            total_bytes = 0
+            total_s = 0.0
+            for doc in corpus:
+                size = len(doc["text"].encode("utf-8"))
+                row = {"name": doc["name"], "bytes": size, "expected": doc["expected"]}
+                if pipeline == "legacy" and size > self.max_legacy_bytes:
+                    row["skipped"] = True
+                    documents.append(row)
+                    continue
+
+                # The fallbacks print and log per object; keep the output readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    try:
+                        valid, invalid = self.recover(
+                            pipeline, jsonHandler, jsonRepair, doc["text"]
+                        )
+                    except Exception as e:
+                        jsonHandler.count_fallback("pipeline.error")
+                        logger.warning(f"{pipeline} failed on {doc['name']}: {e}")
+                        valid, invalid = [], []
+                    elapsed = time.perf_counter() - start
+
+                    # Not part of data_cleaner(), so timed separately
+                    start = time.perf_counter()
+                    rescued = self.rescue(jsonHandler, invalid)
+                    rescue_s = time.perf_counter() - start
+
+                total_bytes += size
+                total_s += elapsed
+                row.update(
+                    {
+                        "seconds": round(elapsed, 6),
+                        "mb_per_s": round(size / elapsed / 1e6, 3) if elapsed else None,
+                        "recovered": len(valid),
+                        "items_sha256": hashlib.sha256(
+                            json.dumps(valid, sort_keys=True).encode("utf-8")
+                        ).hexdigest(),
+                        "rescued": rescued,
+                        "rescue_seconds": round(rescue_s, 6),
+                        "recovered_ratio": (
+                            round(len(valid) / doc["expected"], 3)
+                            if doc["expected"]
+                            else None
+                        ),
+                    }
+                )
+                documents.append(row)
+
+            results[pipeline] = {
+                "mb_per_s": round(total_bytes / total_s / 1e6, 3) if total_s else None,
+                "seconds": round(total_s, 6),
+                "fallbacks": dict(sorted(jsonHandler.fallbacks.items())),
+                "documents": documents,
+            }
+        return results
+
+    def compare(self, results, baseline="legacy", candidate="tokenizer"):
+        """
+        Compare the items two pipelines recovered from each document.
+
+        :param results: Output of run() holding both pipelines
+        :return: Dict of outcome counts (identical, improved, regressed,
+                 different, both_empty) and the names of the documents that
+                 regressed or differ
+        """
+        stats = {
+            "identical": 0,
+            "improved": 0,
+            "regressed": 0,
+            "different": 0,
+            "both_empty": 0,
+            "changed": [],
+        }
+        for old, new in zip(
+            results[baseline]["documents"], results[candidate]["documents"]
+        ):
+            if old.get("skipped") or new.get("skipped"):
+                continue
+            if not old["recovered"] and not new["recovered"]:
+                stats["both_empty"] += 1
+            elif old["items_sha256"] == new["items_sha256"]:
+                stats["identical"] += 1
+            elif new["recovered"] > old["recovered"]:
+                stats["improved"] += 1
+            elif new["recovered"] < old["recovered"]:
+                stats["regressed"] += 1
+                stats["changed"].append(old["name"])
+            else:
+                stats["different"] += 1
+                stats["changed"].append(old["name"])
+        return stats
+
+    def scaling(self, counts=(100, 500, 2000)):
+        """Time both repairs on documents with a growing number of repeats."""
+        jsonHandler = JSONHandler()
+        jsonRepair = JSONRepair()
+        rows = []
+        for count in counts:
+            text = self.repeat_document(count)
+            start = time.perf_counter()
+            jsonHandler.legacy_repair(text)
+            legacy_s = time.perf_counter() - start
+            start = time.perf_counter()
+            jsonRepair.repair(text)
+            repair_s = time.perf_counter() - start
+            rows.append(
+                {
+                    "items": count,
+                    "legacy_s": round(legacy_s, 4),
+                    "tokenizer_s": round(repair_s, 4),
+                }
+            )
+        return rows
+
+    def report(self, results):
+        lines = []
+        for pipeline, result in results.items():
+            lines.append(
+                f"== {pipeline}: {result['mb_per_s']} MB/s over {result['seconds']} s"
+            )
+            for row in result["documents"]:
+                if row.get("skipped"):
+                    lines.append(f"  {row['name']:<40} skipped ({row['bytes']} bytes)")
+                    continue
+                lines.append(
+                    f"  {row['name']:<40} {row['bytes']:>9} B "
+                    f"{row['mb_per_s']!s:>9} MB/s "
+                    f"recovered {row['recovered']}/{row['expected']} "
+                    f"(+{row['rescued']} rescued)"
+                )
+            for name, count in result["fallbacks"].items():
+                lines.append(f"  fallback {name}: {count}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the JSON recovery of LLM Postman output"
+    )
+    parser.add_argument(
+        "-r", "--recorded", help="Directory of recorded completions or {i}.json files"
+    )
+    parser.add_argument(
+        "--no-synthetic",
+        action="store_true",
+        help="Skip the synthetic and regression corpus",
+    )
+    parser.add_argument(
+        "-p",
+        "--pipeline",
+        action="append",
+        choices=JSONBench.PIPELINES,
+        help="Pipeline to run (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--max-legacy-bytes",
+        type=int,
+        default=1024 * 1024,
+        help="Skip the legacy pipeline on larger documents",
+    )
+    parser.add_argument(
+        "--scaling",
+        type=int,
+        nargs="*",
+        metavar="ITEMS",
+        help="Also time both repairs on this many repeat items (default: 100 500 2000)",
+    )
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("JSONHandler").setLevel(logging.CRITICAL)
+    bench = JSONBench(max_legacy_bytes=args.max_legacy_bytes)
+    corpus = []
+    if not args.no_synthetic:
+        corpus = bench.regression_corpus() + bench.synthetic_corpus()
+    if args.recorded:
+        corpus += bench.recorded_corpus(args.recorded)
+
+    results = bench.run(corpus, args.pipeline)
+    print(bench.report(results))
+    if "legacy" in results and "tokenizer" in results:
+        results["comparison"] = bench.compare(results)
+        comparison = results["comparison"]
+        print(
+            f"== tokenizer vs legacy: {comparison['identical']} identical, "
+            f"{comparison['improved']} improved, {comparison['regressed']} "
+            f"regressed, {comparison['different']} different, "
+            f"{comparison['both_empty']} both empty"
+        )
+        for name in comparison["changed"]:
+            print(f"  changed: {name}")
+    if args.scaling is not None:
+        results["scaling"] = bench.scaling(args.scaling or (100, 500, 2000))
+        for row in results["scaling"]:
+            print(
+                f"== {row['items']} repeat items: legacy {row['legacy_s']} s, "
+                f"tokenizer {row['tokenizer_s']} s"
+            )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+# Usage: python JSONBench.py [-r <recorded_dir>] [--scaling [N ...]] [-o results.json]
+if __name__ == "__main__":
+    main()
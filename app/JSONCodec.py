@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+try:
+    import orjson
+except ImportError:  # optional, only used when selected
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # optional, only used when selected
+    ujson = None
+
+logger = logging.getLogger(__name__)
+
+
+class JSONCodec:
+    """
+    Single JSON serialization facade for the generated artifacts
+    (collections, fuzz test cases, environments).
+
+    dumps() produces compact JSON with non-ASCII characters kept as is. The
+    backend is chosen by ACME_JSON_BACKEND: "stdlib" (default), "orjson",
+    "ujson" or "auto" (orjson if installed, else stdlib). The fast backends
+    are not byte-identical to the stdlib: floats may be formatted
+    differently (1e16 instead of 1e+16, 0.000025 instead of 2.5e-05) and
+    orjson writes NaN/Infinity as null. Values they reject (non-string keys,
+    lone surrogates, integers beyond 64 bits) fall back to the stdlib, and
+    so does loading text with integers orjson would turn into floats.
+
+    Untrusted input (LLM output, uploaded specs) is parsed with the stdlib
+    json module directly, not through this class.
+    """
+
+    SURROGATE = re.compile(r"[\ud800-\udfff]")
+    # Integer literals orjson.loads may silently turn into floats (beyond 64 bits)
+    BIG_INT = re.compile(r"\d{19,}")
+
+    @staticmethod
+    def select_backend(name=None):
+        name = (name or os.getenv("ACME_JSON_BACKEND", "stdlib")).lower()
+        if name == "auto":
+            return "orjson" if orjson is not None else "stdlib"
+        if name == "orjson" and orjson is None:
+            logger.warning("orjson is not installed, using the stdlib JSON backend")
+            return "stdlib"
+        if name == "ujson" and ujson is None:
+            logger.warning("ujson is not installed, using the stdlib JSON backend")
+            return "stdlib"
+        if name not in ("orjson", "ujson", "stdlib"):
+            logger.warning(f"Unknown JSON backend '{name}', using stdlib")
+            return "stdlib"
+        return name
+
+    @classmethod
+    def _stdlib_dumps(cls, obj):
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        if not text.isascii() and cls.SURROGATE.search(text):
+            # Lone surrogates cannot be written as UTF-8, keep them escaped
+            return json.dumps(obj, separators=(",", ":"))
+        return text
+
+    @classmethod
+    def dumps(cls, obj, backend=None):
+        """
+        Serialize obj to compact JSON text.
+
+        :param backend: Backend to use instead of the ACME_JSON_BACKEND one
+        """
+        backend = backend or BACKEND
+        if backend == "orjson":
+            try:
+                return orjson.dumps(obj).decode("utf-8")
+            except (TypeError, orjson.JSONEncodeError):
+                pass
+        elif backend == "ujson":
+            try:
+                return ujson.dumps(
+                    obj, ensure_ascii=False, escape_forward_slashes=False
+                )
+            except (TypeError, OverflowError, ValueError):
+                pass
+        return cls._stdlib_dumps(obj)
+
+    @classmethod
+    def loads(cls, text, backend=None):
+        """
+        Parse JSON text.
+
+        :param backend: Backend to use instead of the ACME_JSON_BACKEND one
+        :raises ValueError: (json.JSONDecodeError) if text is not valid JSON
+        """
+        backend = backend or BACKEND
+        if backend == "orjson" and not cls.BIG_INT.search(text):
+            try:
+                return orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass  # let the stdlib decide (it also accepts NaN/Infinity)
+        elif backend == "ujson" and not cls.BIG_INT.search(text):
+            try:
+                return ujson.loads(text)
+            except ValueError:
+                pass
+        return json.loads(text)
+
+
+BACKEND = JSONCodec.select_backend()
+
+
+def benchmark(paths, rounds=5):
+    """
+    Compare the available backends on generated collections.
+
+    :param paths: Collection files (e.g. post-postman.json) or directories
+                  searched for *.json files
+    :return: List of per file results, with whether the backends produced
+             identical output for the file
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(
+                    os.path.join(root, n) for n in sorted(names) if n.endswith(".json")
+                )
+        else:
+            files.append(path)
+
+    backends = ["stdlib"] + [
+        name
+        for name, module in (("orjson", orjson), ("ujson", ujson))
+        if module is not None
+    ]
+    results = []
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        row = {"file": file_path, "bytes": len(text.encode("utf-8"))}
+        outputs = {}
+        for backend in backends:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                obj = JSONCodec.loads(text, backend)
+            loads_s = (time.perf_counter() - start) / rounds
+            start = time.perf_counter()
+            for _ in range(rounds):
+                outputs[backend] = JSONCodec.dumps(obj, backend)
+            dumps_s = (time.perf_counter() - start) / rounds
+            row[backend] = {
+                "loads_ms": round(loads_s * 1000, 3),
+                "dumps_ms": round(dumps_s * 1000, 3),
+            }
+        row["identical"] = len(set(outputs.values())) == 1
+        results.append(row)
+    return results
+
+
+# Usage: python JSONCodec.py <post-postman.json | job_dir> ...
+if __name__ == "__main__":
+    print(json.dumps(benchmark(sys.argv[1:]), indent=4))
@@ -33,6 +33,11 @@ class JSONHandler:
 
         :param file_path: Path to the JSON file to save/load data
         """
+        # Hits of the repair and recovery paths, by "function.path"
+        self.fallbacks = {}
+
+    def count_fallback(self, name, n=1):
+        self.fallbacks[name] = self.fallbacks.get(name, 0) + n
 
     def validate_json_string(self, json_string: str):
         """
@@ -103,40 +108,58 @@ class JSONHandler:
 
         logger.info(f"✅ String successfully saved to {file_path}")
 
-    def build_postman_script(self, var_dict):
+    # Shared JavaScript function to generate random strings
+    GENERATOR_FUNCTION = [
+        "function generateLargeRandomString(length) {",
+        "    const characters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789';",
+        "    const charactersLength = characters.length;",
+        "    const chunkSize = 10000; // generate 10k chars at a time",
+        "    let result = [];",
+        "",
+        "    let remaining = length;",
+        "    while (remaining > 0) {",
+        "        const currentChunkSize = Math.min(chunkSize, remaining);",
+        "        const chunk = new Array(currentChunkSize);",
+        "",
+        "        for (let i = 0; i < currentChunkSize; i++) {",
+        "            chunk[i] = characters[Math.floor(Math.random() * charactersLength)];",
+        "        }",
+        "",
+        "        result.push(chunk.join(''));",
+        "        remaining -= currentChunkSize;",
+        "    }",
+        "",
+        "    return result.join('');",
+        "}",
+        "",
+    ]
+
+    def _prerequest_event(self, script_lines):
+        return [
+            {
+                "listen": "prerequest",
+                "script": {
+                    "exec": script_lines,
+                    "type": "text/javascript",
+                    "packages": {},
+                    "requests": {},
+                },
+            }
+        ]
+
+    def build_postman_script(self, var_dict, include_function=True):
         """
         Build a Postman pre-request script JSON string, where each key in var_dict
         is a variable name and its value is the length for generateLargeRandomString(length).
 
         Example:
             var_dict = {"tokenA": 10, "tokenB": 25}
-        """
 
-        # Shared JavaScript function to generate random strings
-        script_lines = [
-            "function generateLargeRandomString(length) {",
-            "    const characters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789';",
-            "    const charactersLength = characters.length;",
-            "    const chunkSize = 10000; // generate 10k chars at a time",
-            "    let result = [];",
-            "",
-            "    let remaining = length;",
-            "    while (remaining > 0) {",
-            "        const currentChunkSize = Math.min(chunkSize, remaining);",
-            "        const chunk = new Array(currentChunkSize);",
-            "",
-            "        for (let i = 0; i < currentChunkSize; i++) {",
-            "            chunk[i] = characters[Math.floor(Math.random() * charactersLength)];",
-            "        }",
-            "",
-            "        result.push(chunk.join(''));",
-            "        remaining -= currentChunkSize;",
-            "    }",
-            "",
-            "    return result.join('');",
-            "}",
-            "",
-        ]
+        :param include_function: Embed generateLargeRandomString in the script;
+                                 False when the collection defines it once
+                                 (see build_shared_script)
+        """
+        script_lines = list(self.GENERATOR_FUNCTION) if include_function else []
 
         # Add JavaScript for each variable/length pair
         for var_name, length in var_dict.items():
@@ -149,20 +172,23 @@ class JSONHandler:
             )
 
         # Wrap in Postman-style JSON structure
-        postman_data = [
-            {
-                "listen": "prerequest",
-                "script": {
-                    "exec": script_lines,
-                    "type": "text/javascript",
-                    "packages": {},
-                    "requests": {},
-                },
-            }
-        ]
+        return self._prerequest_event(script_lines)
 
-        # Return formatted JSON string
-        return postman_data
+    def build_shared_script(self):
+        """
+        Build the collection-level pre-request event defining
+        generateLargeRandomString for all items.
+
+        Collection and item scripts run in separate scopes, so the function is
+        assigned to an implicit global rather than declared, which keeps it
+        visible to the item scripts that run after it.
+        """
+        script_lines = (
+            ["generateLargeRandomString = function (length) {"]
+            + self.GENERATOR_FUNCTION[1:-2]
+            + ["};"]
+        )
+        return self._prerequest_event(script_lines)
 
     def read_string(self, file) -> str:
         """
@@ -284,6 +310,7 @@ class JSONHandler:
             matches = localpattern.findall(match)
 
             for chars, num in matches:
+                self.count_fallback("eliminate_repeat.repeat")
                 exist = self.find_chars_to_replace(big, start, end)
                 if exist != "":
                     replace = self.to_replace_with(exist)
@@ -291,6 +318,23 @@ class JSONHandler:
 
         return json_str
 
+    def legacy_repair(self, text):
+        """
+        Regex/replace based clean-up of repeats and string concatenations.
+
+        Superseded by JSONRepair.repair(); kept for ACME_JSON_REPAIR=legacy
+        and for benchmarking.
+        """
+        allItems = self.eliminate_repeat(text)
+        pattern = r'"\s\+'
+        matches = re.finditer(pattern, allItems)
+        temp = allItems
+        for match in matches:
+            self.count_fallback("find_index_of_plus.concat")
+            exist = self.find_index_of_plus(allItems, match.start(), match.end())
+            temp = temp.replace(exist, "")
+        return temp
+
     def find_index_of_plus(self, str, start, end):
         new_start = 0
         new_end = 0
@@ -339,12 +383,14 @@ class JSONHandler:
             return json.loads(raw_str)
         except json.JSONDecodeError as e:
             logger.error(f"❌ Parsing failed: {e}, trying literal_eval ")
+            self.count_fallback("fix_json_string.literal_eval")
             # As last resort, try using ast.literal_eval
 
             try:
                 return ast.literal_eval(raw_str)
             except Exception as e2:
                 logger.error(f"❌ Literal eval failed:: {e2}")
+                self.count_fallback("fix_json_string.failed")
                 return None
 
     def rescue_parse_list(self, raw_string: str):
@@ -370,9 +416,11 @@ class JSONHandler:
         try:
             json_data = json.loads(fixed_text)
             logger.info("✅ JSON loaded successfully !")
+            self.count_fallback("rescue_parse_list.recovered")
             return json_data
         except json.JSONDecodeError as e:
             print("JSON is still invalid:", e)
+            self.count_fallback("rescue_parse_list.failed")
             return []
 
     def rescue_parse_raw_(self, raw_str):
@@ -405,54 +453,252 @@ class JSONHandler:
 
         return clean_dict
 
-    def extract_json_objects(sefl, text):
-        objects = []
-        brace_level = 0
-        start = None
+    DECODER = json.JSONDecoder()
+    BRACE = re.compile(r"[{}]")
 
-        for i, ch in enumerate(text):
-            if ch == "{":
-                if brace_level == 0:
-                    start = i
-                brace_level += 1
-            elif ch == "}":
-                brace_level -= 1
-                if brace_level == 0 and start is not None:
-                    objects.append(text[start : i + 1])
-                    start = None
-        return objects
+    # Top-level structure of an object: string literals (skipped whole) and braces
+    OBJECT_STRUCTURE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}]', re.DOTALL)
+
+    def find_object_end(self, text, start, strings=True):
+        """
+        Find the end of the object opening at start.
+
+        :param strings: Skip string literals; without, every brace counts (as
+                        the original splitter did, which copes better with
+                        unescaped quotes inside payloads)
+        :return: Index just past the closing brace, or -1 if it is never closed
+        """
+        depth = 0
+        pattern = self.OBJECT_STRUCTURE if strings else self.BRACE
+        for match in pattern.finditer(text, start):
+            token = match.group()
+            if token == "{":
+                depth += 1
+            elif token == "}":
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        return -1
+
+    def iter_json_objects(self, text):
+        """
+        Split text into its top-level JSON objects in one linear pass.
+
+        The end of each object is found with a string-aware brace scan, then
+        the object alone is decoded with JSONDecoder.raw_decode (decoding it
+        in place would make every error count the newlines of the whole
+        text). An object that does not decode is skipped, so the scan
+        resumes right after it instead of rescanning.
+
+        An unescaped quote in a payload throws the string scan off, making
+        it swallow the following items or never close. A failed object
+        therefore ends at the earlier of the two scans, string-aware and
+        plain brace counting, and only text whose braces never balance is
+        given up.
+
+        :param text: Text holding comma separated objects and stray garbage
+        :return: Generator of (object or None, error or None, start, end)
+        """
+        pos = text.find("{")
+        while pos != -1:
+            end = self.find_object_end(text, pos)
+            if end != -1:
+                try:
+                    value, _ = self.DECODER.raw_decode(text[pos:end])
+                    yield value, None, pos, end
+                    pos = text.find("{", end)
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            else:
+                error = "Unterminated object"
+
+            plain_end = self.find_object_end(text, pos, strings=False)
+            if plain_end != -1 and (end == -1 or plain_end < end):
+                end = plain_end
+            if end == -1:
+                # Truncated: every later brace is nested inside this object
+                yield None, error, pos, len(text)
+                return
+            yield None, error, pos, end
+            pos = text.find("{", end)
+
+    def extract_json_objects(self, text):
+        return [text[start:end] for _, _, start, end in self.iter_json_objects(text)]
 
     # Step 2: Try parsing each object, collect good and bad ones
     def parse_item(self, data):
-        objs = self.extract_json_objects(data)
         valid = []
         invalid = []
         result = []
 
-        for idx, obj in enumerate(objs, 1):
-            try:
-                parsed = json.loads(obj)
-                valid.append(parsed)
-                logger.info(f"✅ Object #{idx} parsed successfully")
-            except Exception as e:
-                invalid.append({"index": idx, "error": str(e), "object": obj})
-                logger.warn(f"❌ Warnning in object #{idx}: {e}")
+        for idx, (obj, error, start, end) in enumerate(self.iter_json_objects(data), 1):
+            if error is None:
+                valid.append(obj)
+            else:
+                invalid.append(
+                    {"index": idx, "error": error, "object": data[start:end]}
+                )
         result.append(valid)
         result.append(invalid)
+        self.count_fallback("parse_item.valid_object", len(valid))
+        self.count_fallback("parse_item.invalid_object", len(invalid))
 
-        # Step 3: Save results
-        # with open("valid.json", "w", encoding="utf-8") as f:
-        #   json.dump(valid, f, indent=2, ensure_ascii=False)
-
-        # with open("invalid.json", "w", encoding="utf-8") as f:
-        #   json.dump(invalid, f, indent=2, ensure_ascii=False)
-
-        print("\nSummary:")
         logger.info(f"✅ {len(valid)} valid objects")
-        logger.info(f"❌ {len(invalid)} invalid objects")
+        if invalid:
+            logger.warning(f"❌ {len(invalid)} invalid objects")
         return result
 
 
+class RepeatPlaceholders:
+    """
+    Structured view of the oversized payloads of a Postman item.
+
+    JSON repair turns every "x".repeat(n) into a start_pattern/n/end_pattern
+    marker inside a string. collect() walks a parsed item once, replaces
+    each marker with a {{variable}} reference and records where it was and
+    the payload length, so the pre-request script can be built directly
+    from the records instead of serializing and re-parsing the item.
+    """
+
+    MARKER = re.compile(
+        rf"{re.escape(JSONHandler.start_pattern)}(\d+){re.escape(JSONHandler.end_pattern)}"
+    )
+
+    def collect(self, item, no):
+        """
+        Replace the repeat markers of item in place.
+
+        :param item: Parsed Postman item (dict)
+        :param no: Test case number, used to name the variables avt{no}{k}
+        :return: List of {"variable", "length", "path"} records in document order
+        """
+        records = []
+        self._walk(item, [], no, records)
+        return records
+
+    def _replace(self, value, path, no, records):
+        def substitute(match):
+            variable = f"avt{no}{len(records) + 1}"
+            records.append(
+                {"variable": variable, "length": int(match.group(1)), "path": path}
+            )
+            return f"{{{{{variable}}}}}"
+
+        return self.MARKER.sub(substitute, value)
+
+    def _walk(self, obj, path, no, records):
+        if isinstance(obj, dict):
+            entries = obj.items()
+        elif isinstance(obj, list):
+            entries = enumerate(obj)
+        else:
+            return
+        for key, value in list(entries):
+            if isinstance(value, str):
+                if JSONHandler.start_pattern in value:
+                    obj[key] = self._replace(value, path + [key], no, records)
+            elif isinstance(value, (dict, list)):
+                self._walk(value, path + [key], no, records)
+
+
+class PostmanItemStream:
+    """
+    Incremental extractor of Postman items from a streamed LLM completion.
+
+    Chunks are fed as they arrive; every object of the first "item" array is
+    returned as soon as its closing brace is seen. Brace counting skips
+    string literals, so braces inside payload strings do not split items.
+    """
+
+    ITEM_ARRAY = re.compile(r'"item"\s*:\s*\[')
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self._preamble = ""
+        self._in_array = False
+        self._current = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> list:
+        """
+        Consume a chunk of the completion.
+
+        :param chunk: Next piece of the completion text
+        :return: List of item object strings completed by this chunk
+        """
+        if self.done:
+            return []
+
+        if not self._in_array:
+            self._preamble += chunk
+            match = self.ITEM_ARRAY.search(self._preamble)
+            if match is None:
+                return []
+            chunk = self._preamble[match.end() :]
+            self._preamble = ""
+            self._in_array = True
+
+        completed = []
+        start = 0 if self._depth > 0 else None
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._current.append(chunk[start : i + 1])
+                    completed.append("".join(self._current))
+                    self._current = []
+                    start = None
+            elif ch == "]" and self._depth == 0:
+                self.done = True
+                break
+
+        if self._depth > 0 and start is not None:
+            self._current.append(chunk[start:])
+
+        self.items.extend(completed)
+        return completed
+
+    def to_collection(self) -> str:
+        """Rebuild a minimal collection holding only the completed items."""
+        return '{"item": [\n' + ",\n".join(self.items) + "\n]}"
+
+
+class StreamedItems:
+    """
+    Outcome of a streamed completion: the item texts in the order they
+    closed, the items already parsed, the texts left for the full recovery
+    pipeline, and whether the stream reached the end of the item array.
+    """
+
+    def __init__(self):
+        self.texts = []
+        self.items = []
+        self.failed = []
+        self.complete = False
+        self.error = None
+
+    def to_collection(self) -> str:
+        """Rebuild a minimal collection holding the completed items."""
+        return '{"item": [\n' + ",\n".join(self.texts) + "\n]}"
+
+
 # Example usage
 if __name__ == "__main__":
     jsonHandler = JSONHandler()
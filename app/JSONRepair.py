@@ -0,0 +1,158 @@
+import logging
+import re
+
+from JSONHandler import JSONHandler
+
+logger = logging.getLogger(__name__)
+
+
+class JSONRepair:
+    """
+    Single-pass repair of the JavaScript-isms LLMs put in Postman items.
+
+    The input is scanned once, left to right; only string literals and a few
+    structural characters are inspected, everything else is copied through.
+    The following are rewritten into valid JSON:
+
+    - "x".repeat(n)           -> "<start_pattern>n<end_pattern>"
+    - "a" + "b" (+ ...)       -> "ab"
+    - "a" + userId + "b"      -> "ab" (identifier operands are dropped, as
+                                 the legacy clean-up did)
+    - 'single quoted'         -> "single quoted"
+    - trailing commas         -> dropped (before ] / } and at the end)
+    - // and /* */ comments   -> dropped
+    - raw control characters  -> escaped inside strings
+
+    Repeats follow the placeholder convention of JSONHandler, so the output
+    is a drop-in replacement for eliminate_repeat() plus the concatenation
+    clean-up of ACME.data_cleaner().
+    """
+
+    # Run of text needing no rewrite: anything but quotes, commas and slashes,
+    # well-formed double quoted strings not followed by . or +, and commas
+    # that are not trailing. The scan stops on the next candidate rewrite.
+    PLAIN = re.compile(
+        r"(?:[^\"',/]+"
+        r'|"[^"\\\x00-\x1f]*(?:\\[^\x00-\x1f][^"\\\x00-\x1f]*)*"(?!\s*[.+])'
+        r"|,(?!\s*(?:[\]}]|\Z)))*"
+    )
+    DOUBLE_QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL)
+    SINGLE_QUOTED = re.compile(r"'((?:[^'\\]|\\.)*)'", re.DOTALL)
+    REPEAT = re.compile(r"\s*\.repeat\(\s*(\d+)\s*\)")
+    CONCAT = re.compile(r"\s*\+\s*(?=[\"'])")
+    # "+ name" operands that are not literals (variables, numbers, calls);
+    # either followed by another literal, or ending the value
+    IDENTIFIER_CONCAT = re.compile(
+        r"(?:\s*\+\s*[\w$.]+(?:\(\))?)+(?:\s*\+\s*(?=[\"'])|(?=\s*[,\]}]|\s*$))"
+    )
+    TRAILING_COMMA = re.compile(r",(\s*)(?=[\]}]|$)")
+    LINE_COMMENT = re.compile(r"//[^\n]*")
+    BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+    CONTROL = re.compile(r"[\x00-\x1f]")
+    UNESCAPED_QUOTE = re.compile(r'(?<!\\)((?:\\\\)*)"')
+
+    def __init__(self, start_pattern=None, end_pattern=None):
+        """
+        :param start_pattern: Marker written before a repeat length
+        :param end_pattern: Marker written after a repeat length
+        """
+        self.start_pattern = start_pattern or JSONHandler.start_pattern
+        self.end_pattern = end_pattern or JSONHandler.end_pattern
+
+    def _escape_control(self, match):
+        ch = match.group()
+        return {"\n": "\\n", "\r": "\\r", "\t": "\\t"}.get(ch, f"\\u{ord(ch):04x}")
+
+    def _operand(self, text, pos):
+        """
+        Read one string operand (a literal, optionally .repeat(n)) at pos.
+
+        :return: (JSON-escaped body, end position) or (None, pos) if there
+                 is no complete literal at pos
+        """
+        if text[pos] == '"':
+            match = self.DOUBLE_QUOTED.match(text, pos)
+            if match is None:
+                return None, pos
+            body = match.group(1)
+        else:
+            match = self.SINGLE_QUOTED.match(text, pos)
+            if match is None:
+                return None, pos
+            body = match.group(1).replace("\\'", "'")
+            body = self.UNESCAPED_QUOTE.sub(r'\1\\"', body)
+        end = match.end()
+
+        if self.CONTROL.search(body):
+            body = self.CONTROL.sub(self._escape_control, body)
+
+        repeat = self.REPEAT.match(text, end)
+        if repeat is not None:
+            body = f"{self.start_pattern}{repeat.group(1)}{self.end_pattern}"
+            end = repeat.end()
+        return body, end
+
+    def repair(self, text: str) -> str:
+        """
+        Rewrite text into valid JSON where possible.
+
+        Input that cannot be repaired (e.g. an unterminated string) is copied
+        unchanged from that point on, so callers can still fall back to
+        JSONHandler.parse_item().
+
+        :param text: JSON-like text, typically comma separated Postman items
+        :return: Repaired text
+        """
+        out = []
+        pos = 0
+        length = len(text)
+        while pos < length:
+            start = self.PLAIN.match(text, pos).end()
+            out.append(text[pos:start])
+            if start >= length:
+                break
+            ch = text[start]
+
+            if ch == '"' or ch == "'":
+                body, end = self._operand(text, start)
+                if body is None:
+                    out.append(text[start:])
+                    break
+                parts = [body]
+                while True:
+                    concat = self.CONCAT.match(text, end) or (
+                        self.IDENTIFIER_CONCAT.match(text, end)
+                    )
+                    if concat is None:
+                        break
+                    if concat.end() >= length or text[concat.end()] not in "\"'":
+                        end = concat.end()  # trailing identifiers, dropped
+                        break
+                    body, next_end = self._operand(text, concat.end())
+                    if body is None:
+                        break
+                    parts.append(body)
+                    end = next_end
+                out.append('"' + "".join(parts) + '"')
+                pos = end
+
+            elif ch == ",":
+                trailing = self.TRAILING_COMMA.match(text, start)
+                if trailing is not None:
+                    out.append(trailing.group(1))
+                    pos = trailing.end()
+                else:
+                    out.append(",")
+                    pos = start + 1
+
+            else:  # "/"
+                comment = self.LINE_COMMENT.match(text, start) or (
+                    self.BLOCK_COMMENT.match(text, start)
+                )
+                if comment is not None:
+                    pos = comment.end()
+                else:
+                    out.append("/")
+                    pos = start + 1
+
+        return "".join(out)
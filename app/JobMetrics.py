@@ -0,0 +1,259 @@
+import json
+import logging
+import os
+import resource
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # optional, /proc/self/statm is read instead
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+# End of iteration marker of JobMetrics.iter_span
+_END = object()
+
+
+class PhaseTimer:
+    """
+    Accumulates the time spent inside its with-blocks and records the total
+    as one span of a JobMetrics (see JobMetrics.timer).
+    """
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = None
+        self.total = 0.0
+        self._entered = None
+
+    def __enter__(self):
+        self._entered = time.perf_counter()
+        if self.start is None:
+            self.start = self._entered
+        return self
+
+    def __exit__(self, *exc):
+        self.total += time.perf_counter() - self._entered
+        return False
+
+    def record(self):
+        """Record the accumulated time as a span."""
+        start = self.start if self.start is not None else time.perf_counter()
+        self.metrics.add_span(self.name, start, self.total, **self.labels)
+
+
+class JobMetrics:
+    """
+    Thread-safe collector of per-job instrumentation.
+
+    Records wall-time spans (per stage and per endpoint), LLM token counts,
+    free-form counters (e.g. JSON repair outcomes) and memory. The resident
+    set size is sampled at the job start and at the end of every span, so
+    the peak and delta reported are those of this job, not of the worker
+    process (ru_maxrss never goes down across jobs). The result
+    is saved as metrics.json in the job output directory and optionally
+    pushed to StatsD and/or a Prometheus textfile.
+    """
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self.tokens = {"prompt": 0, "completion": 0, "requests": 0}
+        self.rss_baseline_mb = self.rss_mb()
+        self.rss_peak_mb = self.rss_baseline_mb
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the enclosed block as a span called name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start, **labels)
+
+    def add_span(self, name, start, duration, **labels):
+        """
+        Record a span measured by the caller, e.g. the total of a phase
+        interleaved with others.
+
+        :param start: time.perf_counter() at the start of the span
+        :param duration: Duration in seconds
+        """
+        rss = self.rss_mb()
+        with self._lock:
+            self.rss_peak_mb = max(self.rss_peak_mb, rss)
+            self.spans.append(
+                {
+                    "name": name,
+                    "labels": labels,
+                    "start_s": round(start - self._start, 6),
+                    "duration_s": round(duration, 6),
+                    "rss_mb": rss,
+                }
+            )
+
+    def timer(self, name, **labels):
+        """
+        Return a PhaseTimer for a phase that runs in many short slices
+        interleaved with other phases (e.g. per item of a stream).
+        """
+        return PhaseTimer(self, name, labels)
+
+    def iter_span(self, name, items, **labels):
+        """
+        Yield from items, recording the time spent producing them as one
+        span called name (for generators consumed by another stage).
+        """
+        timer = self.timer(name, **labels)
+        it = iter(items)
+        try:
+            while True:
+                with timer:
+                    item = next(it, _END)
+                if item is _END:
+                    break
+                yield item
+        finally:
+            timer.record()
+
+    def incr(self, name, n=1):
+        """Increment a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_tokens(self, prompt_tokens, completion_tokens):
+        """Record the token usage of one LLM request."""
+        with self._lock:
+            self.tokens["prompt"] += prompt_tokens or 0
+            self.tokens["completion"] += completion_tokens or 0
+            self.tokens["requests"] += 1
+
+    @staticmethod
+    def rss_mb():
+        """
+        Current resident set size of this process in MB (psutil if installed,
+        else /proc/self/statm, else the process peak as a last resort).
+        """
+        if psutil is not None:
+            return round(psutil.Process().memory_info().rss / (1024 * 1024), 2)
+        try:
+            with open("/proc/self/statm", "r") as f:
+                pages = int(f.read().split()[1])
+            return round(pages * resource.getpagesize() / (1024 * 1024), 2)
+        except (OSError, ValueError, IndexError):
+            pass
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":  # bytes on macOS, KB elsewhere
+            return round(peak / (1024 * 1024), 2)
+        return round(peak / 1024, 2)
+
+    def peak_rss_mb(self):
+        """Highest resident set size sampled during this job in MB."""
+        rss = self.rss_mb()
+        with self._lock:
+            self.rss_peak_mb = max(self.rss_peak_mb, rss)
+            return self.rss_peak_mb
+
+    def stage_totals(self):
+        """Total duration per span name."""
+        totals = {}
+        for span in self.spans:
+            totals[span["name"]] = totals.get(span["name"], 0) + span["duration_s"]
+        return {name: round(total, 6) for name, total in totals.items()}
+
+    def to_dict(self):
+        peak = self.peak_rss_mb()
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "wall_time_s": round(time.perf_counter() - self._start, 6),
+                "rss_baseline_mb": self.rss_baseline_mb,
+                "peak_rss_mb": peak,
+                "rss_delta_mb": round(peak - self.rss_baseline_mb, 2),
+                "tokens": dict(self.tokens),
+                "counters": dict(self.counters),
+                "stages": self.stage_totals(),
+                "spans": list(self.spans),
+            }
+
+    def save(self, output_dir):
+        """Write metrics.json into the job output directory."""
+        file_path = f"{output_dir}metrics.json"
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4)
+        logger.info(f"Saved job metrics to {file_path}")
+
+    def export(self):
+        """
+        Push the metrics to the exporters configured by ACME_STATSD_HOST /
+        ACME_STATSD_PORT and ACME_PROMETHEUS_TEXTFILE. Failures are logged,
+        never raised.
+        """
+        metrics = self.to_dict()
+        statsd_host = os.getenv("ACME_STATSD_HOST")
+        textfile = os.getenv("ACME_PROMETHEUS_TEXTFILE")
+        try:
+            if statsd_host:
+                self._export_statsd(
+                    metrics, statsd_host, int(os.getenv("ACME_STATSD_PORT", "8125"))
+                )
+            if textfile:
+                self._export_prometheus(metrics, textfile)
+        except Exception:
+            logger.warning("Could not export job metrics", exc_info=True)
+
+    def _export_statsd(self, metrics, host, port):
+        lines = [
+            f"acme.job.wall_time:{metrics['wall_time_s'] * 1000:.0f}|ms",
+            f"acme.job.peak_rss_mb:{metrics['peak_rss_mb']}|g",
+            f"acme.job.rss_delta_mb:{metrics['rss_delta_mb']}|g",
+        ]
+        for name, duration in metrics["stages"].items():
+            lines.append(f"acme.stage.{name}:{duration * 1000:.0f}|ms")
+        for name, value in metrics["tokens"].items():
+            lines.append(f"acme.llm.{name}:{value}|c")
+        for name, value in metrics["counters"].items():
+            lines.append(f"acme.{name}:{value}|c")
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for line in lines:
+                sock.sendto(line.encode("utf-8"), (host, port))
+        finally:
+            sock.close()
+
+    def _export_prometheus(self, metrics, file_path):
+        """Write the last job's metrics for the node_exporter textfile collector."""
+        lines = [
+            "# TYPE acme_job_wall_time_seconds gauge",
+            f"acme_job_wall_time_seconds {metrics['wall_time_s']}",
+            "# TYPE acme_job_peak_rss_megabytes gauge",
+            f"acme_job_peak_rss_megabytes {metrics['peak_rss_mb']}",
+            "# TYPE acme_job_rss_delta_megabytes gauge",
+            f"acme_job_rss_delta_megabytes {metrics['rss_delta_mb']}",
+            "# TYPE acme_stage_duration_seconds gauge",
+        ]
+        for name, duration in metrics["stages"].items():
+            lines.append(f'acme_stage_duration_seconds{{stage="{name}"}} {duration}')
+        lines.append("# TYPE acme_llm_tokens gauge")
+        for name, value in metrics["tokens"].items():
+            lines.append(f'acme_llm_tokens{{kind="{name}"}} {value}')
+        lines.append("# TYPE acme_job_counter gauge")
+        for name, value in metrics["counters"].items():
+            lines.append(f'acme_job_counter{{name="{name}"}} {value}')
+
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, file_path)
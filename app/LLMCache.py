@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+from CacheDir import CacheDir
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """
+    Content-addressed on-disk cache of raw LLM completions.
+
+    Entries are keyed by the normalized endpoint definition, the selected
+    vulnerabilities (head_prompt), the model/engine and the sampling
+    parameters. Each entry is one file; its modification time doubles as the
+    last access time, which drives both TTL expiry and LRU eviction.
+    Eviction runs at most once per evict_interval, so the directory can
+    briefly hold more than max_entries entries.
+    """
+
+    def __init__(
+        self, cache_dir, ttl=7 * 24 * 3600, max_entries=10000, evict_interval=600
+    ):
+        """
+        :param cache_dir: Directory holding the cache entries
+        :param ttl: Entry lifetime in seconds since last access
+        :param max_entries: Maximum number of entries kept on disk
+        :param evict_interval: Minimum seconds between two evictions
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_interval = evict_interval
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a cache from ACME_LLM_CACHE_DIR / ACME_LLM_CACHE_TTL /
+        ACME_LLM_CACHE_MAX_ENTRIES / ACME_LLM_CACHE_EVICT_INTERVAL, or return
+        None if caching is disabled.
+        """
+        cache_dir = os.getenv("ACME_LLM_CACHE_DIR")
+        if not cache_dir:
+            return None
+        return cls(
+            cache_dir,
+            ttl=int(os.getenv("ACME_LLM_CACHE_TTL", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("ACME_LLM_CACHE_MAX_ENTRIES", "10000")),
+            evict_interval=int(os.getenv("ACME_LLM_CACHE_EVICT_INTERVAL", "600")),
+        )
+
+    @staticmethod
+    def make_key(
+        endpoint,
+        head_prompt,
+        engine,
+        temperature,
+        max_tokens=None,
+        variant=None,
+        template=None,
+    ):
+        """
+        Hash the inputs that determine an LLM completion.
+
+        :param variant: Optional name of the prompt variant (e.g. "compact")
+        :param template: Fingerprint of the prompt template and system
+                         message (see template_hash), so prompt changes do
+                         not serve stale entries
+        :return: Hex SHA-256 digest
+        """
+        material = {
+            "endpoint": endpoint,
+            "head_prompt": head_prompt,
+            "engine": engine,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if variant is not None:
+            material["variant"] = variant
+        if template is not None:
+            material["template"] = template
+        normalized = json.dumps(
+            material, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def template_hash(messages):
+        """
+        Fingerprint the chat messages of a prompt rendered for a placeholder
+        endpoint, i.e. everything but the endpoint itself.
+
+        :return: Hex SHA-256 digest
+        """
+        normalized = json.dumps(messages, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key):
+        """
+        Return the cached completion for key, or None on a miss or expired entry.
+        """
+        path = self._path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > self.ttl:
+                os.remove(path)
+                logger.info(f"LLM cache entry expired: {key}")
+                return None
+
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+
+        logger.info(f"LLM cache hit: {key}")
+        return value
+
+    def put(self, key, value):
+        """Store a completion, evicting old entries when an eviction is due."""
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp_path, path)  # atomic, safe with concurrent workers
+        if CacheDir.evict_due(self.cache_dir, self.evict_interval):
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        expired, overflow = CacheDir.evict(
+            self.cache_dir, ".txt", self.max_entries, self.ttl
+        )
+        if expired or overflow:
+            logger.info(
+                f"LLM cache evicted {expired} expired and {overflow} LRU entries"
+            )
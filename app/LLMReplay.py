@@ -0,0 +1,339 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from AIEngine import AIEngine
+
+logger = logging.getLogger(__name__)
+
+# Returned when nothing has been recorded yet, so replay always has an answer
+DEFAULT_COMPLETION = """{
+    "info": {"name": "ACME replay", "schema": "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"},
+    "item": [
+        {
+            "name": "Replay - invalid id",
+            "request": {
+                "method": "GET",
+                "header": [{"key": "Authorization", "value": "Bearer {{auth_token_invalid}}"}],
+                "url": {"raw": "{{baseUrl}}/resource/{{resource_id}}"}
+            }
+        }
+    ]
+}"""
+
+
+class LLMRecorder:
+    """
+    On-disk store of LLM completions keyed by the SHA-256 of the prompt.
+
+    Lookups of unknown prompts fall back to a recording picked
+    deterministically from the prompt hash, so replaying a spec that was never
+    recorded still produces stable, realistic completions.
+    """
+
+    def __init__(self, record_dir):
+        self.record_dir = record_dir
+        self._lock = threading.Lock()
+        self._records = None
+        os.makedirs(record_dir, exist_ok=True)
+
+    @staticmethod
+    def key(prompt):
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def save(self, prompt, completion):
+        """Record the completion of a prompt."""
+        key = self.key(prompt)
+        file_path = os.path.join(self.record_dir, f"{key}.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump({"prompt": prompt, "completion": completion}, f, indent=4)
+        with self._lock:
+            self._records = None
+        logger.info(f"Recorded LLM completion {key}")
+
+    def _load(self):
+        with self._lock:
+            if self._records is None:
+                records = {}
+                for name in sorted(os.listdir(self.record_dir)):
+                    if not name.endswith(".json"):
+                        continue
+                    with open(
+                        os.path.join(self.record_dir, name), "r", encoding="utf-8"
+                    ) as f:
+                        records[name[: -len(".json")]] = json.load(f)["completion"]
+                self._records = records
+            return self._records
+
+    def lookup(self, prompt):
+        """Return the recorded completion of a prompt (or a stable substitute)."""
+        records = self._load()
+        key = self.key(prompt)
+        if key in records:
+            return records[key]
+        if not records:
+            return DEFAULT_COMPLETION
+        keys = list(records)
+        return records[keys[int(key, 16) % len(keys)]]
+
+
+class RecordingAIEngine(AIEngine):
+    """AIEngine that records every live completion for later replay."""
+
+    def __init__(self, record_dir):
+        super().__init__()
+        self.recorder = LLMRecorder(record_dir)
+
+    def _complete(self, prompt, client):
+        completion = super()._complete(prompt, client)
+        self.recorder.save(prompt, completion)
+        return completion
+
+    def stream_with_llm(self, prompt, client):
+        chunks = []
+        for chunk in super().stream_with_llm(prompt, client):
+            chunks.append(chunk)
+            yield chunk
+        self.recorder.save(prompt, "".join(chunks).strip())
+
+
+class ReplayAIEngine(AIEngine):
+    """
+    AIEngine answering from recorded completions, without Azure credentials.
+
+    Latency (with jitter) and failures can be injected to emulate the live
+    service under load.
+    """
+
+    def __init__(self, record_dir, latency=0.0, jitter=0.0, error_rate=0.0):
+        """
+        :param record_dir: Directory of recorded completions
+        :param latency: Mean seconds per completion
+        :param jitter: Maximum +/- seconds added to the latency
+        :param error_rate: Probability (0..1) that a call fails
+        """
+        super().__init__()
+        self.max_retries = 0
+        self.recorder = LLMRecorder(record_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a replay engine from ACME_LLM_RECORD_DIR / ACME_REPLAY_LATENCY /
+        ACME_REPLAY_JITTER / ACME_REPLAY_ERROR_RATE.
+        """
+        return cls(
+            os.environ["ACME_LLM_RECORD_DIR"],
+            latency=float(os.getenv("ACME_REPLAY_LATENCY", "0")),
+            jitter=float(os.getenv("ACME_REPLAY_JITTER", "0")),
+            error_rate=float(os.getenv("ACME_REPLAY_ERROR_RATE", "0")),
+        )
+
+    def _load_credentials(self):
+        self.AZURE_OPENAI_KEY = ""
+        self.AZURE_OPENAI_ENDPOINT = ""
+        self.AZURE_OPENAI_API_VERSION = ""
+        self.AZURE_OPENAI_ENGINE = "replay"
+
+    def _make_client(self):
+        return None
+
+    def _delay(self):
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _complete(self, prompt, client):
+        time.sleep(self._delay())
+        if random.random() < self.error_rate:
+            raise RuntimeError("Injected LLM replay failure")
+        completion = self.recorder.lookup(prompt).strip()
+        self.report_usage(prompt, completion)
+        return completion
+
+    def stream_with_llm(self, prompt, client):
+        completion = self._complete(prompt, client)
+        for i in range(0, len(completion), 64):
+            yield completion[i : i + 64]
+
+
+class LLMStubServer:
+    """
+    Local OpenAI-compatible chat completions server replaying recordings.
+
+    Point AZURE_OPENAI_ENDPOINT at it to run the unmodified AIEngine /
+    AsyncAIEngine offline. Besides latency and 500 errors it can answer 429
+    with Retry-After, to exercise the LLMScheduler.
+    """
+
+    def __init__(
+        self,
+        record_dir,
+        host="127.0.0.1",
+        port=8089,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        throttle_rate=0.0,
+    ):
+        self.recorder = LLMRecorder(record_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self.path.split("?", 1)[0].endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "Not found"}})
+                    return
+
+                length = int(self.headers.get("Content-Length", "0"))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                time.sleep(
+                    max(0.0, stub.latency + random.uniform(-stub.jitter, stub.jitter))
+                )
+
+                roll = random.random()
+                if roll < stub.throttle_rate:
+                    self._send_json(
+                        429,
+                        {"error": {"code": "429", "message": "Rate limit exceeded"}},
+                        {"Retry-After": "1", "retry-after-ms": "1000"},
+                    )
+                    return
+                if roll < stub.throttle_rate + stub.error_rate:
+                    self._send_json(500, {"error": {"message": "Injected failure"}})
+                    return
+
+                messages = request.get("messages", [])
+                prompt = messages[1]["content"] if len(messages) > 1 else ""
+                completion = stub.recorder.lookup(prompt).strip()
+                if request.get("stream"):
+                    self._stream(request, completion)
+                else:
+                    self._send_json(200, stub.completion(request, prompt, completion))
+
+            def _stream(self, request, completion):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for i in range(0, len(completion), 64):
+                    chunk = {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": request.get("model", "replay"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"content": completion[i : i + 64]},
+                                "finish_reason": None,
+                            }
+                        ],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+
+        return Handler
+
+    def completion(self, request, prompt, completion):
+        prompt_tokens = AIEngine.count_tokens(prompt)
+        completion_tokens = AIEngine.count_tokens(completion)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "replay"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": completion},
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread."""
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        logger.info(f"LLM stub server listening on {self.url}")
+        return thread
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="acme-llm-replay",
+        description="Serve recorded LLM completions (see ReplayBench.py to "
+        "benchmark ACME offline)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the LLM stub server")
+    serve_parser.add_argument("-r", "--records", required=True, help="Record dir")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8089)
+    serve_parser.add_argument("--latency", type=float, default=0.0)
+    serve_parser.add_argument("--jitter", type=float, default=0.0)
+    serve_parser.add_argument("--error-rate", type=float, default=0.0)
+    serve_parser.add_argument("--throttle-rate", type=float, default=0.0)
+
+    args = parser.parse_args()
+    server = LLMStubServer(
+        args.records,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+    )
+    print(f"Serving recorded completions on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
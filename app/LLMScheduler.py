@@ -0,0 +1,242 @@
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most one
+    minute of capacity.
+
+    Callers reserve an amount up front and are told how long to wait before
+    using it; the balance may go negative, which queues later callers behind
+    earlier ones. With a Redis client the bucket is shared by every worker
+    using the same name, otherwise it is local to the process.
+    """
+
+    # Atomic refill + reserve; uses the Redis clock so workers agree on time
+    _RESERVE_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local amount = tonumber(ARGV[3])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate) - amount
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], 300)
+    if tokens >= 0 then
+        return '0'
+    end
+    return tostring(-tokens / rate)
+    """
+
+    def __init__(self, name, rate_per_minute, redis_client=None):
+        """
+        :param name: Bucket name, shared across workers through Redis
+        :param rate_per_minute: Refill rate (and capacity) per minute
+        :param redis_client: Optional redis.Redis client
+        """
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.redis = redis_client
+        self._script = None
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._ts = time.monotonic()
+
+        if self.redis is not None:
+            self._script = self.redis.register_script(self._RESERVE_SCRIPT)
+
+    def reserve(self, amount):
+        """
+        Reserve amount tokens.
+
+        :return: Seconds the caller must wait before using them
+        """
+        amount = min(amount, self.capacity)
+        if self._script is not None:
+            try:
+                return float(
+                    self._script(
+                        keys=[f"acme:ratelimit:{self.name}"],
+                        args=[self.rate, self.capacity, amount],
+                    )
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Redis rate limiter unavailable ({e}), using local bucket"
+                )
+                self._script = None
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._ts) * self.rate
+            )
+            self._ts = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class LLMScheduler:
+    """
+    Applies request/token rate limits and retries to LLM calls.
+
+    Before each call a request and its estimated tokens (prompt plus
+    max_tokens, the way Azure OpenAI accounts quota) are reserved from the
+    shared buckets. Rate limit, timeout, connection and server errors are
+    retried with jittered exponential backoff, honoring Retry-After.
+    """
+
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+    def __init__(
+        self,
+        requests_per_minute=0,
+        tokens_per_minute=0,
+        max_retries=6,
+        base_delay=1.0,
+        max_delay=60.0,
+        redis_client=None,
+    ):
+        """
+        :param requests_per_minute: Request quota, 0 for unlimited
+        :param tokens_per_minute: Token quota, 0 for unlimited
+        :param max_retries: Retries per call before the error is raised
+        :param base_delay: First backoff step in seconds
+        :param max_delay: Upper bound of a single backoff in seconds
+        :param redis_client: Optional redis.Redis client to share quotas across workers
+        """
+        self.request_bucket = None
+        self.token_bucket = None
+        if requests_per_minute > 0:
+            self.request_bucket = TokenBucket(
+                "requests", requests_per_minute, redis_client
+            )
+        if tokens_per_minute > 0:
+            self.token_bucket = TokenBucket("tokens", tokens_per_minute, redis_client)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a scheduler from ACME_LLM_RPM / ACME_LLM_TPM / ACME_LLM_MAX_RETRIES.
+        Quotas are shared through Redis when REDIS_HOST is set.
+        """
+        requests_per_minute = int(os.getenv("ACME_LLM_RPM", "0"))
+        tokens_per_minute = int(os.getenv("ACME_LLM_TPM", "0"))
+
+        redis_client = None
+        redis_host = os.getenv("REDIS_HOST")
+        if redis_host and (requests_per_minute > 0 or tokens_per_minute > 0):
+            try:
+                import redis
+
+                redis_client = redis.Redis(host=redis_host, port=6379, db=0)
+            except ImportError:
+                logger.warning("redis package not installed, using local rate limits")
+
+        return cls(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_retries=int(os.getenv("ACME_LLM_MAX_RETRIES", "6")),
+            redis_client=redis_client,
+        )
+
+    def _reserve(self, tokens):
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket is not None:
+            wait = max(wait, self.token_bucket.reserve(tokens))
+        return wait
+
+    def _retry_delay(self, error, attempt):
+        """Delay before the next attempt: Retry-After if given, else full jitter."""
+        response = getattr(error, "response", None)
+        headers = response.headers if response is not None else {}
+
+        retry_after = None
+        try:
+            if headers.get("retry-after-ms"):
+                retry_after = float(headers["retry-after-ms"]) / 1000
+            elif headers.get("retry-after"):
+                value = headers["retry-after"]
+                try:
+                    retry_after = float(value)
+                except ValueError:
+                    retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+                    retry_after = max(0.0, retry_at - time.time())
+        except (TypeError, ValueError):
+            retry_after = None
+
+        if retry_after is not None:
+            # Small jitter so workers told the same instant do not stampede
+            return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def run(self, tokens, call):
+        """
+        Run a blocking LLM call under the rate limits, retrying transient errors.
+
+        :param tokens: Estimated tokens the call consumes
+        :param call: Zero-argument callable performing the request
+        """
+        for attempt in range(self.max_retries + 1):
+            wait = self._reserve(tokens)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return call()
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"LLM call failed ({type(e).__name__}), retry {attempt + 1}/"
+                    f"{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    async def arun(self, tokens, call):
+        """
+        Async counterpart of run().
+
+        :param call: Zero-argument callable returning an awaitable
+        """
+        for attempt in range(self.max_retries + 1):
+            wait = self._reserve(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await call()
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"LLM call failed ({type(e).__name__}), retry {attempt + 1}/"
+                    f"{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
@@ -3,8 +3,10 @@ import logging
 import os
 from datetime import datetime
 
-import yaml
-from openapi_spec_validator import validate_spec
+from RefResolver import RefResolver
+from SpecCache import SpecCache
+from SpecLoader import SpecLoader
+from SpecValidator import SpecValidator
 
 # from openapi_spec_validator.exceptions import OpenAPIValidationError
 
@@ -34,6 +36,8 @@ class OpenAPIHandler:
     Professional OpenAPI file handler with JSON-formatted audit logging.
     """
 
+    HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
     def __init__(self, openapi_file: str):
         """
         Initialize OpenAPIHandler.
@@ -45,6 +49,10 @@ class OpenAPIHandler:
         self.data = None
         self.paths = {}
         self.parsed_paths = []
+        self.refResolver = None
+        # Parsed specs shared by every handler of the process (None if disabled)
+        self.cache = SpecCache.shared()
+        self.validator = SpecValidator()
 
         self._log_audit(
             "initialize", f"Initialized OpenAPIHandler for file {self.abs_path}"
@@ -76,112 +84,167 @@ class OpenAPIHandler:
             )
             raise FileNotFoundError(f"OpenAPI file not found: {self.abs_path}")
 
-        with open(self.openapi_file, "r", encoding="utf-8") as f:
-            if ext in [".yaml", ".yml"]:
-                self.data = yaml.safe_load(f)
-            elif ext == ".json":
-                self.data = json.load(f)
-            else:
-                self._log_audit(
-                    "load_file", f"Unsupported file format: {ext}", user="system"
-                )
-                raise ValueError(
-                    f"Unsupported file format: {ext}. Use .json or .yaml/.yml"
-                )
+        if ext not in [".yaml", ".yml", ".json"]:
+            self._log_audit(
+                "load_file", f"Unsupported file format: {ext}", user="system"
+            )
+            raise ValueError(f"Unsupported file format: {ext}. Use .json or .yaml/.yml")
+
+        specLoader = SpecLoader()
+        self.data = specLoader.load(self.openapi_file)
 
         self._log_audit(
-            "load_file", f"Successfully loaded OpenAPI file: {self.abs_path}"
+            "load_file",
+            f"Successfully loaded OpenAPI file: {self.abs_path} "
+            f"({specLoader.parser} parser, {specLoader.seconds * 1000:.1f} ms)",
         )
 
-    def _validate_file(self):
-        """Validate OpenAPI file for required fields and strict compliance."""
-        required_fields = ["openapi", "info", "paths"]
-        for field in required_fields:
-            if field not in self.data:
-                self._log_audit("validate_file", f"Missing required field: {field}")
-                raise ValueError(f"Invalid OpenAPI file: Missing field '{field}'")
+    def _validate_file(self, key=None):
+        """
+        Validate OpenAPI file at the configured level (ACME_SPEC_VALIDATION).
+
+        The full validation is skipped when the upload already recorded a
+        verdict for this content.
+
+        :param key: Content hash of the file, if already computed
+        """
+        if self.validator.level == "off":
+            self._log_audit("validate_file", "OpenAPI file validation disabled")
+            return
+
+        try:
+            self.validator.structural(self.data)
+        except ValueError as e:
+            self._log_audit("validate_file", str(e))
+            raise
+        if self.validator.level == "structural":
+            self._log_audit("validate_file", "OpenAPI file structure is valid")
+            return
+
+        verdict = SpecValidator.read_verdict(
+            os.path.dirname(self.abs_path), key or SpecCache.make_key(self.openapi_file)
+        )
+        if verdict is not None:
+            self._log_audit(
+                "validate_file",
+                f"Using the upload validation verdict (valid={verdict['valid']})",
+            )
+            if not verdict["valid"]:
+                raise ValueError(verdict["error"])
+            return
 
         try:
-            validate_spec(self.data)
+            self.validator.full(self.data)
             self._log_audit("validate_file", "OpenAPI file validation successful")
         except Exception as e:
             self._log_audit("validate_file", f"Unexpected validation error: {e}")
             raise
 
-    def _parse_openapi(self):
+    def _load_spec(self):
         """
-        Parse OpenAPI file to extract endpoints and their details.
+        Load and validate the OpenAPI file, or take the document from the
+        spec cache if a file with the same content was already validated.
         """
+        content_key = key = None
+        if os.path.exists(self.openapi_file):
+            content_key = SpecCache.make_key(self.openapi_file)
+        if self.cache is not None and content_key is not None:
+            # Documents validated at another level are cached separately
+            key = f"{content_key}-{self.validator.level}"
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.data = cached
+                self.paths = self.data.get("paths", {})
+                self._log_audit("load_file", "Loaded OpenAPI file from spec cache")
+                return
+
         self._load_file()
-        self._validate_file()
+        self._validate_file(content_key)
+        self.paths = self.data.get("paths", {})
+        if key is not None:
+            self.cache.put(key, self.data)
+
+    def iter_endpoints(self):
+        """
+        Yield the endpoints of the spec one operation at a time.
+
+        Each endpoint is a lightweight view: a shallow copy of the operation
+        with the path-level parameters merged in and the schemas it uses
+        resolved under "components". The loaded document is not modified.
+        Path item keys that are not HTTP methods (parameters, summary,
+        servers, ...) are skipped.
+
+        :return: Generator of {"path", "endpoint"} dictionaries, in the same
+                 format as get_endpoints()
+        """
+        if self.data is None:
+            self._load_spec()
+        if self.refResolver is None:
+            self.refResolver = RefResolver(self.data)
+
         base_url = ""
         servers = self.data.get("servers", {})
         if servers is not None and len(servers) > 0:
             base_url = servers[0]["url"]
-        components = self.data.get("components", {})
-
-        self.paths = self.data.get("paths", {})
-        self.parsed_paths = []
 
-        for path, methods in self.paths.items():
-            for method, details in methods.items():
-                schemas = self.extract_schemas(components, details)
-                ach_new = {"schemas": schemas}
-                details["components"] = ach_new
-                entry = {
+        count = 0
+        for path, path_item in self.paths.items():
+            if not isinstance(path_item, dict):
+                continue
+            shared_parameters = path_item.get("parameters") or []
+            for method, details in path_item.items():
+                if method.lower() not in self.HTTP_METHODS or not isinstance(
+                    details, dict
+                ):
+                    continue
+                count += 1
+                yield {
                     "path": f"{method.upper()}: {base_url}{path}",
-                    "endpoint": {method: details},
+                    "endpoint": {
+                        method: self.endpoint_view(details, shared_parameters)
+                    },
                 }
-                self.parsed_paths.append(entry)
-
-        self._log_audit("parse_file", f"Parsed {len(self.parsed_paths)} endpoints")
-
-    def extract_schemas(self, components, details):
-        keys = details.keys()
-        keys_list = list(keys)
-        ret_schema = {}
-        if "requestBody" in keys_list:
-            requestBody = details["requestBody"]
-            refs = self.extract_refs(requestBody, refs=None)
-            if refs is not None and len(refs) > 0:
-                ret_obj = self.extract_schema_object(components, refs[0])
-                keys = ret_obj.keys()
-                for k in keys:
-                    ret_schema[k] = ret_obj[k]
-
-        if "responses" in keys_list:
-            responses = details["responses"]
-            refs = self.extract_refs(responses, refs=None)
-            if refs is not None and len(refs) > 0:
-                ret_obj = self.extract_schema_object(components, refs[0])
-                keys = ret_obj.keys()
-                for k in keys:
-                    ret_schema[k] = ret_obj[k]
-        return ret_schema
-
-    def extract_schema_object(self, components, refs):
-        schemas = components.get("schemas", {})
-        obj = {}
-        for schema_name, schema_obj in schemas.items():
-            last_part = refs.split("/")[-1]
-            if last_part == schema_name:
-                obj[schema_name] = schema_obj
-        return obj
-
-    def extract_refs(self, obj, refs=None):
-        if refs is None:
-            refs = []
-
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if key == "$ref":
-                    refs.append(value)
-                else:
-                    self.extract_refs(value, refs)
-        elif isinstance(obj, list):
-            for item in obj:
-                self.extract_refs(item, refs)
-        return refs
+
+        self._log_audit("parse_file", f"Parsed {count} endpoints")
+
+    def endpoint_view(self, details, shared_parameters=None):
+        """
+        Build the endpoint view of an operation without modifying it.
+
+        :param details: Operation object
+        :param shared_parameters: Parameters declared on the path item; the
+                                  operation's own parameters override them
+        :return: Shallow copy of details with "components" attached
+        """
+        view = dict(details)
+        if shared_parameters:
+            own = view.get("parameters") or []
+            overridden = {(p.get("name"), p.get("in")) for p in own}
+            view["parameters"] = [
+                p
+                for p in shared_parameters
+                if (p.get("name"), p.get("in")) not in overridden
+            ] + own
+        view["components"] = {"schemas": self.extract_schemas(view)}
+        return view
+
+    def _parse_openapi(self):
+        """
+        Parse OpenAPI file to extract endpoints and their details.
+        """
+        self.parsed_paths = list(self.iter_endpoints())
+
+    def extract_schemas(self, details):
+        """
+        Resolve the schemas used by the request body and responses of an
+        operation, including the ones they reference in turn.
+
+        :param details: Operation object
+        :return: Dict of schema name -> schema
+        """
+        return self.refResolver.referenced_objects(
+            [details.get("requestBody", {}), details.get("responses", {})]
+        )
 
     def get_endpoints(self, user: str = "system"):
         """
@@ -0,0 +1,205 @@
+import json
+import logging
+import re
+
+from JSONCodec import JSONCodec
+
+logger = logging.getLogger(__name__)
+
+
+class PostmanCollection:
+    """
+    In-memory Postman v2.1 collection.
+
+    Items from the AI and fuzzing stages are appended as parsed objects and
+    the collection is serialized once per artifact, instead of being built
+    and re-parsed as a concatenated string at every stage.
+    """
+
+    NAME = "ACME generated vulnerability test cases !"
+    DESCRIPTION = (
+        "***** Disclaimer for AI-Generated Test Cases *****\n"
+        "- These vulnerability test cases have been automatically generated by an AI model and are provided as-is.\n"
+        "- Users are strongly advised to carefully review and validate them before execution.\n"
+        "- The ACME team makes no warranties, express or implied, regarding the accuracy, completeness, or suitability of these test cases.\n"
+        "- The ACME team does not accept responsibility for any errors, damages, losses, or failure to meet legal or regulatory requirements arising from their use.\n"
+        "- By using these test cases, you acknowledge and agree that all risks and impacts of execution lie solely with you as the user.\n"
+        "- No legal claims, actions, or proceedings may be initiated against the ACME team in connection with any loss or damage resulting from the use of these test cases."
+    )
+    SCHEMA = "https://schema.getpostman.com/json/collection/v2.1.0/collection.json"
+
+    def __init__(self, file_id, items=None):
+        """
+        :param file_id: Job id, used as the _postman_id of the collection
+        :param items: Optional initial list of parsed Postman items
+        """
+        self.info = {
+            "name": self.NAME,
+            "_postman_id": file_id,
+            "description": self.DESCRIPTION,
+            "schema": self.SCHEMA,
+        }
+        self.item = []
+        # Collection-level events (e.g. a shared pre-request script)
+        self.event = None
+        self.environments = None
+        if items:
+            self.add_items(items)
+
+    @classmethod
+    def from_dict(cls, obj):
+        """Wrap a parsed collection (e.g. json.loads of a collection file)."""
+        collection = cls(obj.get("info", {}).get("_postman_id"))
+        collection.info = obj.get("info", collection.info)
+        collection.item = obj.get("item", [])
+        collection.event = obj.get("event")
+        collection.environments = obj.get("environments")
+        return collection
+
+    def add_items(self, items):
+        """Append parsed Postman items."""
+        self.item.extend(items)
+
+    def __len__(self):
+        return len(self.item)
+
+    def to_dict(self):
+        obj = {"info": self.info, "item": self.item}
+        if self.event is not None:
+            obj["event"] = self.event
+        if self.environments is not None:
+            obj["environments"] = self.environments
+        return obj
+
+    def to_json(self, indent=None):
+        """
+        Serialize the collection.
+
+        :param indent: Indentation, or None for the compact form
+        """
+        if indent is None:
+            return JSONCodec.dumps(self.to_dict())
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def save(self, file_path, indent=None):
+        """Write the collection to file_path."""
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(self.to_json(indent))
+        logger.info(
+            f"✅ Postman collection with {len(self)} items saved to {file_path}"
+        )
+
+
+class JSONArrayWriter:
+    """
+    Writes a JSON array to disk one pre-serialized element at a time, so
+    the array never has to be held in memory.
+    """
+
+    def __init__(self, file_path, prefix=""):
+        """
+        :param file_path: Output file
+        :param prefix: Text written before the opening bracket
+        """
+        self.file_path = file_path
+        self.count = 0
+        self._f = open(file_path, "w", encoding="utf-8")
+        self._f.write(prefix + "[")
+
+    def write(self, text):
+        """Append one serialized element."""
+        if self.count:
+            self._f.write(",")
+        self._f.write(text)
+        self.count += 1
+
+    def close(self, suffix=""):
+        """Close the array, write suffix after it and close the file."""
+        self._f.write("]" + suffix)
+        self._f.close()
+        logger.info(f"✅ {self.count} items streamed to {self.file_path}")
+
+
+class PostmanCollectionWriter(JSONArrayWriter):
+    """
+    Streams a Postman collection to disk: the info header first, then the
+    items as they are produced, then the environments. The output is the
+    same compact JSON as PostmanCollection.to_json().
+    """
+
+    def __init__(self, file_path, file_id):
+        info = PostmanCollection(file_id).info
+        super().__init__(file_path, '{"info":' + JSONCodec.dumps(info) + ',"item":')
+
+    def close(self, environments=None, event=None):
+        """
+        :param environments: Environments to embed after the items
+        :param event: Collection-level events to write after the items
+        """
+        suffix = ""
+        if event is not None:
+            suffix += ',"event":' + JSONCodec.dumps(event)
+        if environments is not None:
+            suffix += ',"environments":' + JSONCodec.dumps(environments)
+        super().close(suffix + "}")
+
+
+class VariableIndex:
+    """
+    Index of the {{variable}} placeholders used by the test cases.
+
+    add() walks the string values of an item once, without serializing it,
+    and records which test cases use each variable. The same index feeds
+    the environment embedded in the collection, environment_variables.json
+    and the optional variable usage report.
+    """
+
+    PLACEHOLDER = re.compile(r"\{\{([^}]+)\}\}")
+    # Names accepted in the embedded environment
+    IDENTIFIER = re.compile(r"[a-zA-Z0-9_]+")
+
+    def __init__(self):
+        self.index = {}
+
+    def add(self, item, no):
+        """
+        Record the variables of an item.
+
+        :param item: Parsed Postman item
+        :param no: Test case number
+        """
+        stack = [item]
+        while stack:
+            obj = stack.pop()
+            values = obj.values() if isinstance(obj, dict) else obj
+            for value in values:
+                if isinstance(value, str):
+                    if "{{" in value:
+                        for name in self.PLACEHOLDER.findall(value):
+                            users = self.index.setdefault(name, [])
+                            if not users or users[-1] != no:
+                                users.append(no)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+
+    def variables(self):
+        """All variable names, in order of first use."""
+        return list(self.index)
+
+    def environment_variables(self):
+        """Variable names valid as embedded environment keys."""
+        return [name for name in self.index if self.IDENTIFIER.fullmatch(name)]
+
+    def usage(self):
+        """Variable name -> sorted test case numbers using it."""
+        return {name: sorted(users) for name, users in self.index.items()}
+
+    def save_usage(self, file_path):
+        """Write the "which test cases use variable X" report."""
+        report = {
+            name: {"count": len(users), "test_cases": users}
+            for name, users in self.usage().items()
+        }
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        logger.info(f"✅ Variable usage report saved to {file_path}")
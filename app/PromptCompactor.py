@@ -0,0 +1,109 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PromptCompactor:
+    """
+    Builds compact JSON projections of endpoints for LLM prompts.
+
+    Descriptions, examples, vendor extensions and response bodies are
+    dropped (only the status codes of the responses are kept). Schemas are
+    not inlined: referenced schemas, including the ones they reference in
+    turn, are listed once by name and shared by all endpoints of a batch.
+    """
+
+    DROP_KEYS = {"description", "example", "examples", "externalDocs", "xml"}
+
+    def strip(self, obj):
+        """Recursively drop keys the test generation does not need."""
+        if isinstance(obj, dict):
+            stripped = {}
+            for key, value in obj.items():
+                if key in self.DROP_KEYS or str(key).startswith("x-"):
+                    continue
+                if key == "properties" and isinstance(value, dict):
+                    # Property names are data, never drop them
+                    stripped[key] = {
+                        name: self.strip(schema) for name, schema in value.items()
+                    }
+                else:
+                    stripped[key] = self.strip(value)
+            return stripped
+        if isinstance(obj, list):
+            return [self.strip(v) for v in obj]
+        return obj
+
+    def _refs(self, obj, refs):
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if key == "$ref" and isinstance(value, str):
+                    refs.append(value)
+                else:
+                    self._refs(value, refs)
+        elif isinstance(obj, list):
+            for v in obj:
+                self._refs(v, refs)
+        return refs
+
+    def referenced_schemas(self, obj, available):
+        """
+        Collect the schemas referenced by obj, following references transitively.
+
+        :param obj: Object to scan for $ref
+        :param available: Dict of schema name -> schema
+        :return: Dict of schema name -> stripped schema
+        """
+        schemas = {}
+        pending = self._refs(obj, [])
+        while pending:
+            name = pending.pop().rsplit("/", 1)[-1]
+            if name in schemas or name not in available:
+                continue
+            schemas[name] = self.strip(available[name])
+            self._refs(schemas[name], pending)
+        return schemas
+
+    def compact(self, endpoint):
+        """
+        Project an endpoint entry (as returned by OpenAPIHandler.get_endpoints).
+
+        :return: Dict with the path, the stripped operation and its schemas
+        """
+        method, details = next(iter(endpoint["endpoint"].items()))
+        operation = self.strip(
+            {k: v for k, v in details.items() if k not in ("components", "responses")}
+        )
+        if "responses" in details:
+            operation["responses"] = [str(code) for code in details["responses"]]
+
+        available = (details.get("components") or {}).get("schemas") or {}
+        return {
+            "path": endpoint["path"],
+            "method": method.upper(),
+            "operation": operation,
+            "schemas": self.referenced_schemas(operation, available),
+        }
+
+    def to_text(self, obj):
+        return json.dumps(obj, separators=(",", ":"), default=str)
+
+    def compact_text(self, endpoint):
+        """Compact JSON text of a single endpoint, schemas included."""
+        return self.to_text(self.compact(endpoint))
+
+    def compact_batch(self, endpoints):
+        """
+        Compact several endpoints sharing one schema section.
+
+        :param endpoints: Dict of key -> endpoint entry
+        :return: (dict of key -> compact endpoint text, shared schemas text)
+        """
+        texts = {}
+        schemas = {}
+        for key, endpoint in endpoints.items():
+            compacted = self.compact(endpoint)
+            schemas.update(compacted.pop("schemas"))
+            texts[key] = self.to_text(compacted)
+        return texts, self.to_text(schemas)
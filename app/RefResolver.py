@@ -0,0 +1,137 @@
+import logging
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+
+class RefResolver:
+    """
+    Resolves the local $ref pointers ("#/components/schemas/User") of an
+    OpenAPI document.
+
+    The document is walked once to index every object and array by its JSON
+    pointer, so resolving a reference is a dict lookup. The $refs found under
+    each referenced object and the transitive closure of each reference are
+    memoized, so schemas shared by many endpoints are only scanned once.
+    External references ("other.yaml#/...") are not resolved.
+    """
+
+    def __init__(self, document):
+        """
+        :param document: Parsed OpenAPI document
+        """
+        self.index = {}
+        self._direct = {}
+        self._closure = {}
+        self.unresolved = set()
+        self._build_index(document)
+
+    @staticmethod
+    def _escape(key):
+        return str(key).replace("~", "~0").replace("/", "~1")
+
+    def _build_index(self, document):
+        stack = [("", document)]
+        while stack:
+            pointer, node = stack.pop()
+            self.index[pointer] = node
+            if isinstance(node, dict):
+                children = node.items()
+            elif isinstance(node, list):
+                children = enumerate(node)
+            else:
+                continue
+            for key, value in children:
+                if isinstance(value, (dict, list)):
+                    stack.append((f"{pointer}/{self._escape(key)}", value))
+
+    def resolve(self, ref):
+        """
+        Return the object a local reference points to, or None.
+
+        :param ref: Reference such as "#/components/schemas/User"
+        """
+        if not isinstance(ref, str) or not ref.startswith("#"):
+            return None
+        target = self.index.get(unquote(ref[1:]))
+        if target is None and ref not in self.unresolved:
+            self.unresolved.add(ref)
+            logger.warning(f"Unresolved $ref: {ref}")
+        return target
+
+    @staticmethod
+    def find_refs(obj, refs=None):
+        """
+        Collect the $ref values under obj, in document order, without
+        following them.
+        """
+        if refs is None:
+            refs = []
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                values = []
+                for key, value in node.items():
+                    if key == "$ref" and isinstance(value, str):
+                        refs.append(value)
+                    elif isinstance(value, (dict, list)):
+                        values.append(value)
+                stack.extend(reversed(values))
+            elif isinstance(node, list):
+                stack.extend(reversed([v for v in node if isinstance(v, (dict, list))]))
+        return refs
+
+    def direct_refs(self, ref):
+        """The $refs found inside the target of ref (memoized)."""
+        if ref not in self._direct:
+            target = self.resolve(ref)
+            self._direct[ref] = [] if target is None else self.find_refs(target)
+        return self._direct[ref]
+
+    def closure(self, ref):
+        """
+        ref followed by every reference reachable from it, depth first and
+        without duplicates (cycles are cut). Memoized per reference.
+        """
+        if ref not in self._closure:
+            seen = set()
+            ordered = []
+            stack = [ref]
+            while stack:
+                current = stack.pop()
+                if current in seen:
+                    continue
+                seen.add(current)
+                ordered.append(current)
+                stack.extend(reversed(self.direct_refs(current)))
+            self._closure[ref] = ordered
+        return self._closure[ref]
+
+    def referenced_objects(self, obj, prefix="#/components/schemas/"):
+        """
+        Resolve every reference used by obj, transitively.
+
+        References to other objects (requestBodies, responses, parameters,
+        examples) are followed, but only targets under prefix are returned,
+        so "#/components/requestBodies/Pet" cannot shadow
+        "#/components/schemas/Pet".
+
+        :param prefix: Pointer prefix of the returned objects
+        :return: Dict of referenced name (last pointer segment) -> object, in
+                 order of first use
+        """
+        resolved = {}
+        seen = set()
+        for ref in self.find_refs(obj):
+            for current in self.closure(ref):
+                if current in seen:
+                    continue
+                seen.add(current)
+                if not current.startswith(prefix):
+                    continue
+                target = self.resolve(current)
+                name = current[len(prefix) :].replace("~1", "/").replace("~0", "~")
+                if target is not None and name not in resolved:
+                    resolved[name] = target
+        return resolved
@@ -0,0 +1,121 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def _run_job(openapi_file, head_prompt, keep_output):
+    from ACME import ACME
+
+    output_dir = f"{tempfile.mkdtemp(prefix='acme-bench-')}/"
+    start = time.perf_counter()
+    try:
+        ACME(output_dir).acmeEntry(
+            str(uuid.uuid4()), openapi_file, output_dir, head_prompt
+        )
+        return time.perf_counter() - start
+    finally:
+        if not keep_output:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+
+class ReplayBench:
+    """
+    Throughput benchmark of the full acmeEntry pipeline, run offline against
+    recorded LLM completions (ACME_LLM_MODE=replay, see LLMReplay).
+
+    Jobs run in a process pool, as Celery workers would; the replay latency,
+    jitter and error rate are passed to the workers through the
+    ACME_REPLAY_* settings.
+    """
+
+    def __init__(self, record_dir, latency=0.0, jitter=0.0, error_rate=0.0):
+        """
+        :param record_dir: Directory of recorded completions
+        :param latency: Mean seconds per completion
+        :param jitter: Maximum +/- seconds added to the latency
+        :param error_rate: Probability (0..1) that a completion fails
+        """
+        self.record_dir = record_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def run(self, openapi_file, head_prompt, jobs, workers, keep_output=False):
+        """
+        Run jobs acmeEntry jobs on workers processes.
+
+        :return: Dict of throughput and job latency percentiles
+        """
+        os.environ.update(
+            {
+                "ACME_LLM_MODE": "replay",
+                "ACME_LLM_RECORD_DIR": self.record_dir,
+                "ACME_REPLAY_LATENCY": str(self.latency),
+                "ACME_REPLAY_JITTER": str(self.jitter),
+                "ACME_REPLAY_ERROR_RATE": str(self.error_rate),
+            }
+        )
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            durations = list(
+                executor.map(
+                    _run_job,
+                    [openapi_file] * jobs,
+                    [head_prompt] * jobs,
+                    [keep_output] * jobs,
+                )
+            )
+        elapsed = time.perf_counter() - start
+
+        durations.sort()
+        return {
+            "jobs": jobs,
+            "workers": workers,
+            "elapsed_s": round(elapsed, 3),
+            "jobs_per_s": round(jobs / elapsed, 3),
+            "latency_p50_s": round(statistics.median(durations), 3),
+            "latency_p95_s": round(durations[int(0.95 * (len(durations) - 1))], 3),
+            "latency_max_s": round(durations[-1], 3),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark acmeEntry offline on recorded LLM completions"
+    )
+    parser.add_argument("-f", "--file", required=True, help="OpenAPI file")
+    parser.add_argument("-r", "--records", required=True, help="Record dir")
+    parser.add_argument(
+        "-v", "--vul", help="Vulnerability JSON file (head_prompt dict)"
+    )
+    parser.add_argument("-n", "--jobs", type=int, default=10)
+    parser.add_argument("-w", "--workers", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--keep-output", action="store_true")
+    args = parser.parse_args()
+
+    head_prompt = {"API1:2023": "Broken Object Level Authorization"}
+    if args.vul:
+        with open(args.vul, "r", encoding="utf-8") as f:
+            head_prompt = json.load(f)
+    bench = ReplayBench(args.records, args.latency, args.jitter, args.error_rate)
+    report = bench.run(
+        args.file, head_prompt, args.jobs, args.workers, args.keep_output
+    )
+    print(json.dumps(report, indent=4))
+
+
+# Usage: python ReplayBench.py -f <openapi_file> -r <record_dir> [-n 10 -w 2]
+if __name__ == "__main__":
+    main()
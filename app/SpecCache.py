@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+
+from CacheDir import CacheDir
+
+logger = logging.getLogger(__name__)
+
+
+class SpecCache:
+    """
+    Process-wide cache of parsed and validated OpenAPI specs.
+
+    Entries are keyed by the SHA-256 of the spec file content (plus its
+    extension, which selects the parser), so a spec parsed once per job, or
+    uploaded again unchanged, skips loading and validate_spec(). Every hit
+    returns a private copy, so handlers that mutate their endpoints cannot
+    corrupt the cache.
+
+    The in-memory tier is an LRU of max_entries specs, kept pickled. With a
+    cache_dir, entries are also written to disk as JSON (one file each,
+    modification time used as last access time) and shared between worker
+    processes. The directory may be writable by others, so it never holds
+    pickles; specs that do not survive a JSON round trip unchanged (integer
+    response codes, YAML dates) stay in memory only.
+    """
+
+    # Bump when the cached structure (the validated OpenAPIHandler data) changes
+    VERSION = 4
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self, max_entries=16, cache_dir=None, max_disk_entries=256, evict_interval=600
+    ):
+        """
+        :param max_entries: Specs kept in memory
+        :param cache_dir: Optional directory for the on-disk tier
+        :param max_disk_entries: Specs kept on disk
+        :param evict_interval: Minimum seconds between two disk evictions
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.evict_interval = evict_interval
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a cache from ACME_SPEC_CACHE_SIZE (0 disables it),
+        ACME_SPEC_CACHE_DIR, ACME_SPEC_CACHE_DISK_ENTRIES and
+        ACME_SPEC_CACHE_EVICT_INTERVAL, or return None.
+        """
+        max_entries = int(os.getenv("ACME_SPEC_CACHE_SIZE", "16"))
+        if max_entries <= 0:
+            return None
+        return cls(
+            max_entries,
+            cache_dir=os.getenv("ACME_SPEC_CACHE_DIR") or None,
+            max_disk_entries=int(os.getenv("ACME_SPEC_CACHE_DISK_ENTRIES", "256")),
+            evict_interval=int(os.getenv("ACME_SPEC_CACHE_EVICT_INTERVAL", "600")),
+        )
+
+    @classmethod
+    def shared(cls):
+        """Return the process-wide cache (None if disabled)."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls.from_env() or False
+            return cls._shared or None
+
+    @classmethod
+    def make_key(cls, file_path):
+        """
+        Hash the content of a spec file.
+
+        :return: Hex SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        digest.update(f"v{cls.VERSION}:".encode("utf-8"))
+        digest.update(os.path.splitext(file_path)[1].lower().encode("utf-8"))
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return a private copy of the cached value for key, or None."""
+        with self.lock:
+            blob = self.entries.get(key)
+            if blob is not None:
+                self.entries.move_to_end(key)
+
+        if blob is not None:
+            logger.info(f"Spec cache hit: {key}")
+            return pickle.loads(blob)
+        if not self.cache_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Ignoring unreadable spec cache entry {path}")
+            return None
+        self._remember(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        logger.info(f"Spec cache hit: {key}")
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries if needed."""
+        self._remember(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if not self.cache_dir:
+            return
+
+        try:
+            text = json.dumps(value, ensure_ascii=False, allow_nan=False)
+            exact = json.loads(text) == value
+        except (TypeError, ValueError):
+            exact = False
+        if not exact:
+            logger.info(f"Spec {key} is not plain JSON, caching it in memory only")
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)  # atomic, safe with concurrent workers
+        if CacheDir.evict_due(self.cache_dir, self.evict_interval):
+            self.evict_disk()
+
+    def _remember(self, key, blob):
+        with self.lock:
+            self.entries[key] = blob
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def evict_disk(self):
+        """Drop the least recently used files beyond max_disk_entries."""
+        _, overflow = CacheDir.evict(self.cache_dir, ".json", self.max_disk_entries)
+        if overflow:
+            logger.info(f"Spec cache evicted {overflow} LRU entries")
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class SpecDiff:
+    """
+    Compare the endpoints of a new OpenAPI spec with those of a prior ACME job.
+
+    Each job records a manifest with one fingerprint per endpoint, in the
+    same order as the {i}.json / fuzz_{i}.json artifacts. An endpoint whose
+    fingerprint is found in the previous manifest can reuse the artifacts of
+    that job instead of being regenerated.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, previous_dir=None):
+        """
+        :param previous_dir: Output directory of the prior job (or None)
+        """
+        self.previous_dir = previous_dir
+        self.head_prompt = None
+        self._index = {}
+
+        if previous_dir:
+            self._load_manifest()
+
+    @staticmethod
+    def fingerprint(endpoint):
+        """
+        Hash an endpoint entry (as returned by OpenAPIHandler.get_endpoints).
+
+        :return: Hex SHA-256 digest of the normalized endpoint JSON
+        """
+        normalized = json.dumps(
+            endpoint, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def save_manifest(cls, output_dir, endpoints, head_prompt):
+        """Record the endpoint fingerprints of a job in its output directory."""
+        manifest = {
+            "head_prompt": head_prompt,
+            "endpoints": [
+                {"path": ep["path"], "fingerprint": cls.fingerprint(ep)}
+                for ep in endpoints
+            ],
+        }
+        file_path = os.path.join(output_dir, cls.MANIFEST_FILE)
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+        logger.info(f"Saved endpoint manifest to {file_path}")
+
+    def _load_manifest(self):
+        file_path = os.path.join(self.previous_dir, self.MANIFEST_FILE)
+        if not os.path.isfile(file_path):
+            logger.warning(
+                f"No manifest found in {self.previous_dir}, regenerating all endpoints"
+            )
+            return
+
+        with open(file_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.head_prompt = manifest.get("head_prompt")
+        for j, entry in enumerate(manifest.get("endpoints", [])):
+            self._index.setdefault(entry["fingerprint"], j)
+
+    def match(self, endpoints, artifact):
+        """
+        Map each endpoint to the index of its unchanged counterpart in the
+        previous job, provided that job still has the artifact for it.
+
+        :param endpoints: Endpoints of the new spec
+        :param artifact: Artifact file name pattern, e.g. "{}.json" or "fuzz_{}.json"
+        :return: List with the previous index, or None for added/changed endpoints
+        """
+        matches = [self.match_one(ep, artifact) for ep in endpoints]
+
+        reused = sum(1 for j in matches if j is not None)
+        logger.info(
+            f"Spec diff: reusing {reused} of {len(endpoints)} endpoints, "
+            f"regenerating {len(endpoints) - reused} ({artifact})"
+        )
+        return matches
+
+    def match_one(self, endpoint, artifact):
+        """
+        Index of the unchanged counterpart of one endpoint in the previous
+        job, or None (see match()).
+        """
+        if not self._index:
+            return None
+        j = self._index.get(self.fingerprint(endpoint))
+        if j is not None and not os.path.isfile(
+            os.path.join(self.previous_dir, artifact.format(j))
+        ):
+            j = None
+        return j
+
+    def read_artifact(self, artifact, j):
+        """Read the artifact of endpoint j from the previous job."""
+        file_path = os.path.join(self.previous_dir, artifact.format(j))
+        with open(file_path, "r", encoding="utf-8") as f:
+            return f.read()
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import re
+import time
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# libyaml bindings are an order of magnitude faster than the pure-Python loader
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class SpecLoader:
+    """
+    Shared loader of OpenAPI documents.
+
+    JSON content is parsed with the JSON parser whatever the file extension
+    (YAML is a superset of JSON, so gateways often export JSON as .yaml);
+    YAML is parsed with libyaml's CSafeLoader when available, else with the
+    pure-Python SafeLoader. The parser used and the load time of the last
+    document are kept on the instance and logged.
+    """
+
+    JSON_START = re.compile(r"\s*[\[{]")
+
+    def __init__(self):
+        self.parser = None
+        self.seconds = None
+        self.size = None
+
+    def loads(self, text, fmt=None):
+        """
+        Parse an OpenAPI document.
+
+        :param text: Document content
+        :param fmt: "json" to accept JSON only, otherwise JSON content is
+                    sniffed and anything else is parsed as YAML
+        :raises ValueError: (json.JSONDecodeError) for invalid JSON with fmt="json"
+        :raises yaml.YAMLError: for invalid YAML
+        """
+        text = text.lstrip("\ufeff")
+        if fmt == "json":
+            self.parser = "json"
+            return json.loads(text)
+
+        if self.JSON_START.match(text):
+            try:
+                self.parser = "json"
+                return json.loads(text)
+            except ValueError:
+                pass  # a YAML flow mapping, not JSON
+
+        self.parser = "libyaml" if YAML_LOADER is not yaml.SafeLoader else "yaml"
+        return yaml.load(text, Loader=YAML_LOADER)
+
+    def load(self, file_path):
+        """
+        Load an OpenAPI file (.json, .yaml or .yml).
+
+        :param file_path: Path of the document
+        :return: Parsed document
+        """
+        start = time.perf_counter()
+        with open(file_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        ext = os.path.splitext(file_path)[1].lower()
+        data = self.loads(text, "json" if ext == ".json" else None)
+        self.seconds = time.perf_counter() - start
+        self.size = len(text)
+        logger.info(
+            f"Loaded {file_path} ({self.size} chars) with the {self.parser} "
+            f"parser in {self.seconds * 1000:.1f} ms"
+        )
+        return data
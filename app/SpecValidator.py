@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from openapi_spec_validator import validate_spec
+
+from SpecCache import SpecCache
+
+logger = logging.getLogger(__name__)
+
+
+class SpecValidator:
+    """
+    Tiered validation of OpenAPI documents.
+
+    Levels (ACME_SPEC_VALIDATION):
+    - "off":        no validation
+    - "structural": the top-level openapi/info/paths fields must be present
+    - "full":       structural, then openapi_spec_validator.validate_spec
+
+    The upload endpoint can run the full validation up front (with a
+    timeout) and record its verdict next to the uploaded spec, keyed by the
+    content hash; the worker then trusts the verdict instead of validating
+    the same document again.
+    """
+
+    LEVELS = ("off", "structural", "full")
+    REQUIRED_FIELDS = ["openapi", "info", "paths"]
+    VERDICT_FILE = "spec_validation.json"
+
+    # Full validations started by the upload path; a validation that times
+    # out keeps its thread until it finishes, the pool bounds how many run
+    _executor = ThreadPoolExecutor(max_workers=2)
+
+    def __init__(self, level=None):
+        """
+        :param level: Validation level, or None for ACME_SPEC_VALIDATION
+        """
+        level = (level or os.getenv("ACME_SPEC_VALIDATION", "full")).lower()
+        if level not in self.LEVELS:
+            logger.warning(f"Unknown spec validation level '{level}', using 'full'")
+            level = "full"
+        self.level = level
+
+    def structural(self, data):
+        """
+        Check the top-level fields of a document.
+
+        :raises ValueError: if a required field is missing
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Invalid OpenAPI file: not a mapping")
+        for field in self.REQUIRED_FIELDS:
+            if field not in data:
+                raise ValueError(f"Invalid OpenAPI file: Missing field '{field}'")
+
+    def full(self, data):
+        """Run the complete OpenAPI validation (raises on invalid specs)."""
+        validate_spec(data)
+
+    def validate(self, data):
+        """Validate a document at the configured level."""
+        if self.level == "off":
+            return
+        self.structural(data)
+        if self.level == "full":
+            self.full(data)
+
+    def validate_with_timeout(self, data, timeout):
+        """
+        Validate a document, giving up on the full validation after timeout
+        seconds.
+
+        :return: (valid, error message): valid is None if the validation did
+                 not finish in time
+        """
+        try:
+            self.structural(data)
+        except ValueError as e:
+            return False, str(e)
+        if self.level != "full":
+            return True, None
+
+        future = self._executor.submit(self.full, data)
+        try:
+            future.result(timeout=timeout)
+            return True, None
+        except FutureTimeoutError:
+            logger.warning(
+                f"Spec validation did not finish within {timeout}s, "
+                "deferring it to the worker"
+            )
+            return None, None
+        except Exception as e:
+            # jsonschema errors carry a one-line message besides the full report
+            return False, f"Invalid OpenAPI file: {getattr(e, 'message', e)}"
+
+    @classmethod
+    def write_verdict(cls, spec_dir, key, valid, error=None, seconds=None):
+        """
+        Record the full validation verdict of a spec in its directory.
+
+        :param key: Content hash of the spec (SpecCache.make_key)
+        """
+        verdict = {
+            "key": key,
+            "level": "full",
+            "valid": valid,
+            "error": error,
+            "seconds": None if seconds is None else round(seconds, 4),
+        }
+        file_path = os.path.join(spec_dir, cls.VERDICT_FILE)
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(verdict, f, indent=4)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def read_verdict(cls, spec_dir, key):
+        """
+        Return the recorded verdict for the spec with content hash key, or
+        None if there is none (or it is for other content).
+        """
+        file_path = os.path.join(spec_dir, cls.VERDICT_FILE)
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                verdict = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if verdict.get("key") != key or verdict.get("valid") is None:
+            return None
+        return verdict
+
+    def validate_upload(self, spec_file, data, timeout):
+        """
+        Validate an uploaded spec and record the verdict for the worker.
+
+        :param spec_file: Saved spec, its directory receives the verdict
+        :param data: Parsed spec
+        :param timeout: Seconds allowed for the full validation
+        :return: (valid, error message), valid is None if deferred
+        """
+        start = time.perf_counter()
+        valid, error = self.validate_with_timeout(data, timeout)
+        seconds = time.perf_counter() - start
+        if valid is not None and self.level == "full":
+            self.write_verdict(
+                os.path.dirname(spec_file),
+                SpecCache.make_key(spec_file),
+                valid,
+                error,
+                seconds,
+            )
+        return valid, error
@@ -39,6 +39,38 @@ class VTPrompts:
             f"{endpoint}\n)"""
         prompt = (
             f"Reset context. Given OWASP Top 10 API vulnerabilities: {concatenatedvulernabilities} and endpoint: {endpoint}, generate a valid Postman collection JSON with these rules:\n"
+            + self._postman_rules()
+            + f"- Provide a separate Postman environment JSON with only detected dynamic variables and example values, ready to import\n"
+        )
+        return prompt
+
+    def create_batch_prompt_for_postman(
+        self, endpoints, selectedvulernabilities, schemas=None
+    ):
+        """
+        Build one prompt covering several endpoints.
+
+        :param endpoints: Dict of endpoint key -> endpoint; the keys are echoed
+                          back by the LLM so the response can be split again
+        :param selectedvulernabilities: Selected OWASP vulnerabilities
+        :param schemas: Optional schemas shared by the endpoints, listed once
+        :return: Prompt asking for a JSON object keyed by endpoint key
+        """
+        concatenatedvulernabilities = ", ".join(selectedvulernabilities.values())
+        keys = ", ".join(endpoints.keys())
+        listed = "".join(f"{key}: {endpoint}\n" for key, endpoint in endpoints.items())
+        prompt = (
+            f"Reset context. Given OWASP Top 10 API vulnerabilities: {concatenatedvulernabilities} and the endpoints listed below, generate a valid Postman collection JSON for each endpoint with these rules:\n"
+            + self._postman_rules()
+            + f"- Return a single JSON object whose keys are exactly the endpoint keys ({keys}) and whose values are the Postman collections of those endpoints\n"
+            + f"Endpoints:\n{listed}"
+        )
+        if schemas:
+            prompt += f"Schemas referenced by the endpoints: {schemas}\n"
+        return prompt
+
+    def _postman_rules(self):
+        return (
             f"- Include edge/corner cases: invalid types, very large/small numbers, negative/positive numbers, special characters, empty values\n"
             f"- Create environment variables only for required dynamic elements:\n"
             f"  - Authentication tokens (valid & invalid)\n"
@@ -46,9 +78,7 @@ class VTPrompts:
             f"- For request body, generate vulnerability-focused payloads; do not create variables unless mandatory\n"
             f"- Use {{variable_name}} placeholders for dynamic values\n"
             f"- URL-encode paths where needed\n"
-            f"- Provide a separate Postman environment JSON with only detected dynamic variables and example values, ready to import\n"
         )
-        return prompt
 
 
 def main():
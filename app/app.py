@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import re
+import shutil
 import uuid
 
 from dotenv import load_dotenv
@@ -14,6 +15,8 @@ from flask import Flask, g, jsonify, request, send_file
 from flask_cors import CORS
 from JSONHandler import JSONHandler
 from RequestFormatter import RequestFormatter
+from SpecLoader import SpecLoader
+from SpecValidator import SpecValidator
 from tasks import process_data_task
 from werkzeug.utils import secure_filename
 
@@ -76,6 +79,29 @@ def allowed_file(filename):
 
 load_dotenv()
 ACME_DATA_DIR = os.getenv("ACME_DATA_DIR")
+# Seconds the upload waits for the full spec validation (0: leave it to the worker)
+ACME_SPEC_VALIDATION_TIMEOUT = float(os.getenv("ACME_SPEC_VALIDATION_TIMEOUT", "10"))
+
+
+def send_artifact(fileDownloader, file_path):
+    """
+    Send an artifact, compressed if a precomputed copy matches the client's
+    Accept-Encoding. send_file adds ETag/Last-Modified and answers
+    conditional requests with 304.
+    """
+    served_path, encoding = fileDownloader.negotiate_encoding(
+        file_path, request.accept_encodings
+    )
+    response = send_file(
+        served_path,
+        mimetype="application/json",
+        as_attachment=True,
+        download_name=os.path.basename(file_path),
+    )
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
 
 
 @app.route("/pm/<uuid_value>", methods=["GET"])
@@ -85,7 +111,7 @@ def get_pm(uuid_value):
     fileDownloader = FileDownloader(ACME_DATA_DIR)
     file_path = fileDownloader.get_file_from_uuid(uuid_value, "pm")
     if isinstance(file_path, str):
-        return send_file(file_path, as_attachment=True)
+        return send_artifact(fileDownloader, file_path)
     else:
         return file_path
 
@@ -95,11 +121,32 @@ def get_ev(uuid_value):
     fileDownloader = FileDownloader(ACME_DATA_DIR)
     file_path = fileDownloader.get_file_from_uuid(uuid_value, "ev")
     if isinstance(file_path, str):
-        return send_file(file_path, as_attachment=True)
+        return send_artifact(fileDownloader, file_path)
     else:
         return file_path
 
 
+def validate_uploaded_spec(spec_file):
+    """
+    Validate a saved upload at the ACME_SPEC_VALIDATION level, recording the
+    verdict next to it so the worker does not validate it again.
+
+    :return: Error message if the spec is invalid, else None (also when the
+             validation is deferred to the worker)
+    """
+    specValidator = SpecValidator()
+    if specValidator.level == "off" or ACME_SPEC_VALIDATION_TIMEOUT <= 0:
+        return None
+    try:
+        data = SpecLoader().load(spec_file)
+    except Exception as e:
+        return f"Invalid OpenAPI file: {e}"
+    valid, error = specValidator.validate_upload(
+        spec_file, data, ACME_SPEC_VALIDATION_TIMEOUT
+    )
+    return error if valid is False else None
+
+
 @app.route("/upload", methods=["POST"])
 def upload():
     logger.info("Request received !")
@@ -146,6 +193,19 @@ def upload():
         )
         return jsonify({"error": "File size exceeds 10KB limit"}), 400
 
+    # Optional id of a prior job whose unchanged endpoints can be reused
+    previous = request.form.get("previous")
+    previous_dir = None
+    if previous:
+        fileDownloader = FileDownloader(ACME_DATA_DIR)
+        if not fileDownloader.is_valid_uuid(previous):
+            logger.error(f"Invalid previous job id '{previous}' !")
+            return jsonify({"error": "Invalid 'previous' job id"}), 400
+        previous_dir = f"{fileDownloader.safe_join(ACME_DATA_DIR, previous)}/"
+        if not os.path.isdir(previous_dir):
+            logger.error(f"Previous job '{previous}' not found !")
+            return jsonify({"error": "Previous job not found"}), 404
+
     logger.info("Processing request for vulernability test cases generation !")
     # TODO: Process the data (e.g., save to DB, validate vdata, parse file content)
 
@@ -157,7 +217,16 @@ def upload():
     opeanapi = f"{output_dir}req_{filename}"
     jsonNHandler.save_string(f"{opeanapi}", file_content)
 
-    process_data_task.delay(email, uuid_value, opeanapi, output_dir, json.loads(vdata))
+    # Reject invalid specs before queueing the job
+    error = validate_uploaded_spec(opeanapi)
+    if error is not None:
+        logger.error(f"Rejected upload '{filename}': {error}")
+        shutil.rmtree(output_dir, ignore_errors=True)
+        return jsonify({"error": error}), 400
+
+    process_data_task.delay(
+        email, uuid_value, opeanapi, output_dir, json.loads(vdata), previous_dir
+    )
 
     # new_upload = Upload(
     #   id=uuid_value, email=email, status=False, vdata=vdata, filename=opeanapi
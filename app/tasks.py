@@ -10,11 +10,13 @@ celery = Celery("tasks", broker=f"redis://{rdip}:6379/0")
 
 
 @celery.task
-def process_data_task(email, uuid_value, opeanapi, output_dir, vdata):
+def process_data_task(
+    email, uuid_value, opeanapi, output_dir, vdata, previous_dir=None
+):
     acme = ACME(output_dir)
     print("=========================== In TASK  ===============================")
     print(vdata)
-    acme.acmeEntry(uuid_value, opeanapi, output_dir, vdata)
+    acme.acmeEntry(uuid_value, opeanapi, output_dir, vdata, previous_dir)
     subject = "Your ACME-Generated Postman Test Files Are Ready for Download"
     web_server = f"http://{cont_host}:5000"
     email_body = f"""Dear Customer,
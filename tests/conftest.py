@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The application modules are imported flat, as in app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "app"))
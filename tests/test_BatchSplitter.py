@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+from BatchSplitter import BatchSplitter
+
+ENDPOINTS = [
+    {"path": "GET: https://api.example.com/v1/users/{id}"},
+    {"path": "PUT: https://api.example.com/v1/users/{id}"},
+    {"path": "POST: https://api.example.com/v1/users"},
+    {"path": "GET: https://api.example.com/v1/users/{id}/orders"},
+    {"path": "GET: https://api.example.com/v1/users/me"},
+    {"path": "GET: https://api.example.com/v1/orders"},
+]
+
+
+def item(method, url):
+    return {"name": "t", "request": {"method": method, "url": {"raw": url}}}
+
+
+def response(segments):
+    """Batched completion holding {endpoint index: [items]}."""
+    return json.dumps(
+        {BatchSplitter.key(i): {"item": items} for i, items in segments.items()}
+    )
+
+
+def kept(split):
+    return {i: output is not None for i, output in split.items()}
+
+
+def test_segments_addressing_their_endpoint_are_kept():
+    output = response(
+        {
+            0: [item("GET", "{{baseUrl}}/users/{{user_id}}")],
+            1: [
+                item("PUT", "https://api.example.com/v1/users/1"),
+                item("PUT", "{{baseUrl}}/users/../admin"),
+            ],
+            2: [item("POST", "{{baseUrl}}/users")],
+        }
+    )
+
+    assert kept(BatchSplitter().split(output, [0, 1, 2], ENDPOINTS)) == {
+        0: True,
+        1: True,
+        2: True,
+    }
+
+
+def test_swapped_keys_are_rejected():
+    output = response(
+        {
+            0: [item("GET", "{{baseUrl}}/users/2/orders")],
+            3: [item("GET", "{{baseUrl}}/users/2")],
+        }
+    )
+
+    assert kept(BatchSplitter().split(output, [0, 3], ENDPOINTS)) == {
+        0: False,
+        3: False,
+    }
+
+
+def test_same_path_other_method_is_rejected():
+    output = response(
+        {
+            0: [item("PUT", "{{baseUrl}}/users/1")],
+            1: [item("PUT", "{{baseUrl}}/users/1")],
+        }
+    )
+
+    assert kept(BatchSplitter().split(output, [0, 1], ENDPOINTS)) == {
+        0: False,
+        1: True,
+    }
+
+
+def test_literal_segment_beats_parameter():
+    output = response(
+        {
+            0: [item("GET", "{{baseUrl}}/users/me")],
+            4: [item("GET", "{{baseUrl}}/users/me")],
+        }
+    )
+
+    assert kept(BatchSplitter().split(output, [0, 4], ENDPOINTS)) == {
+        0: False,
+        4: True,
+    }
+
+
+def test_longer_route_beats_suffix_route():
+    # /users/2/orders also ends like /orders
+    output = response(
+        {
+            3: [item("GET", "{{baseUrl}}/users/2/orders")],
+            5: [item("GET", "{{baseUrl}}/users/2/orders")],
+        }
+    )
+
+    assert kept(BatchSplitter().split(output, [3, 5], ENDPOINTS)) == {
+        3: True,
+        5: False,
+    }
+
+
+def test_missing_endpoint_is_regenerated():
+    output = response({0: [item("GET", "{{baseUrl}}/users/1")]})
+
+    assert kept(BatchSplitter().split(output, [0, 2], ENDPOINTS)) == {
+        0: True,
+        2: False,
+    }
+
+
+def test_single_endpoint_and_failed_prompts_pass_through():
+    error = ValueError("failed")
+    splitter = BatchSplitter()
+
+    assert splitter.split("anything", [2], ENDPOINTS) == {2: "anything"}
+    assert splitter.split(error, [0, 1], ENDPOINTS) == {0: error, 1: error}
+
+
+@pytest.mark.parametrize(
+    "url, template, matches",
+    [
+        ("{{baseUrl}}/users/1", ["v1", "users", "{id}"], True),
+        ("https://h/v1/users/1?x=1", ["v1", "users", "{id}"], True),
+        ("/users/1", ["v1", "users", "{id}"], False),
+        ("{{baseUrl}}/users", ["v1", "users", "{id}"], False),
+        ("{{baseUrl}}/accounts/1", ["v1", "users", "{id}"], False),
+    ],
+)
+def test_route_score(url, template, matches):
+    # The server URL path is /v1
+    score = BatchSplitter.route_score(BatchSplitter.path_segments(url), template, 1)
+
+    assert bool(score) == matches
+
+
+def test_base_path_stops_at_the_first_difference():
+    templates = [["v1", "users", "{id}"], ["v1", "users"], ["v1", "orders"]]
+
+    assert BatchSplitter.base_path(templates) == ["v1"]
@@ -0,0 +1,24 @@
+import json
+
+import JSONCodec as codec_module
+from JSONCodec import JSONCodec, benchmark
+
+
+def test_explicit_backend_round_trips():
+    obj = {"name": "VTC 1 - é", "n": [1, 2.5, None], "big": 2**70}
+    for backend in ("stdlib", "orjson", "ujson"):
+        if JSONCodec.select_backend(backend) != backend:
+            continue  # not installed
+        text = JSONCodec.dumps(obj, backend)
+        assert JSONCodec.loads(text, backend) == obj
+
+
+def test_benchmark_leaves_the_selected_backend_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(codec_module, "BACKEND", "stdlib")
+    collection = tmp_path / "post-postman.json"
+    collection.write_text(json.dumps({"item": [{"name": "a", "value": 1.5}]}))
+
+    (row,) = benchmark([str(tmp_path)], rounds=1)
+
+    assert codec_module.BACKEND == "stdlib"
+    assert "stdlib" in row and "loads_ms" in row["stdlib"]
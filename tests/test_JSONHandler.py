@@ -0,0 +1,37 @@
+from JSONBench import JSONBench
+from JSONHandler import JSONHandler
+
+
+def test_unbalanced_quote_does_not_lose_later_items():
+    valid, invalid = JSONHandler().parse_item(
+        '{"name": "abc}, {"name": "ok1"}, {"name": "ok2"}'
+    )
+
+    assert valid == [{"name": "ok1"}, {"name": "ok2"}]
+    assert len(invalid) == 1
+
+
+def test_braces_inside_strings_do_not_split_items():
+    valid, invalid = JSONHandler().parse_item(
+        '{"name": "a {b}"}, {"name": "x{"}, {"name": "ok"}'
+    )
+
+    assert valid == [{"name": "a {b}"}, {"name": "x{"}, {"name": "ok"}]
+    assert invalid == []
+
+
+def test_truncated_last_item_is_reported_once():
+    valid, invalid = JSONHandler().parse_item(
+        '{"name": "ok"}, {"name": "cut", "request": {"method": "GET"}'
+    )
+
+    assert valid == [{"name": "ok"}]
+    assert [entry["error"] for entry in invalid] == ["Unterminated object"]
+
+
+def test_regression_corpus_is_fully_recovered():
+    bench = JSONBench()
+    results = bench.run(bench.regression_corpus(), ["tokenizer"])
+
+    for row in results["tokenizer"]["documents"]:
+        assert row["recovered"] == row["expected"], row["name"]
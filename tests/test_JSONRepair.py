@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from JSONHandler import JSONHandler
+from JSONRepair import JSONRepair
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"raw": "a" + "b"}',
+        '{"raw": "a" + userId + "b"}',
+        '{"raw": "{{baseUrl}}/u/" + user.id + "/x" + "y", "n": 1}',
+        '{"raw": "x" + 1 + "y"}',
+        '{"raw": "" + "A".repeat(3) + ""}',
+    ],
+)
+def test_matches_legacy_repair(text):
+    repaired = JSONRepair().repair(text)
+
+    assert json.loads(repaired) == json.loads(JSONHandler().legacy_repair(text))
+
+
+def test_trailing_identifier_operand_is_dropped():
+    assert json.loads(JSONRepair().repair('{"raw": "a" + userId, "x": 1}')) == {
+        "raw": "a",
+        "x": 1,
+    }
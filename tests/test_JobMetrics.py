@@ -0,0 +1,41 @@
+import time
+
+from JobMetrics import JobMetrics
+
+
+def test_timer_records_one_span_with_the_total_of_its_slices():
+    metrics = JobMetrics()
+    timer = metrics.timer("write_collection", stage="write")
+    for _ in range(3):
+        with timer:
+            time.sleep(0.01)
+        time.sleep(0.02)
+    timer.record()
+
+    (span,) = metrics.spans
+    assert span["name"] == "write_collection"
+    assert span["labels"] == {"stage": "write"}
+    assert 0.03 <= span["duration_s"] < 0.06
+
+
+def test_timer_that_never_ran_records_zero():
+    metrics = JobMetrics()
+    metrics.timer("tag_items").record()
+    assert metrics.spans[0]["duration_s"] == 0.0
+
+
+def test_iter_span_times_producing_items_only():
+    def produce():
+        for i in range(3):
+            time.sleep(0.01)
+            yield i
+
+    metrics = JobMetrics()
+    items = []
+    for item in metrics.iter_span("fuzz", produce()):
+        items.append(item)
+        time.sleep(0.02)
+
+    assert items == [0, 1, 2]
+    (span,) = metrics.spans
+    assert 0.03 <= span["duration_s"] < 0.06
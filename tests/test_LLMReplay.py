@@ -0,0 +1,23 @@
+from AIEngine import AIEngine
+from LLMReplay import ReplayAIEngine
+
+
+def test_replay_engine_needs_no_credentials(tmp_path, monkeypatch):
+    for name in ("KEY", "ENDPOINT", "API_VERSION", "ENGINE"):
+        monkeypatch.delenv(f"AZURE_OPENAI_{name}", raising=False)
+    monkeypatch.setattr("AIEngine.load_dotenv", lambda: None)
+
+    engine = ReplayAIEngine(str(tmp_path))
+
+    assert engine.AZURE_OPENAI_ENGINE == "replay"
+    assert engine.create_ai_cient() is None
+    assert engine.generate_with_llm("prompt", None)
+
+
+def test_replay_engine_has_every_engine_attribute(tmp_path, monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_KEY", "key")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "http://localhost")
+    monkeypatch.setenv("AZURE_OPENAI_API_VERSION", "v")
+    monkeypatch.setenv("AZURE_OPENAI_ENGINE", "engine")
+
+    assert set(vars(AIEngine())) <= set(vars(ReplayAIEngine(str(tmp_path))))
@@ -0,0 +1,70 @@
+from ACMEFuzzer import ACMEFuzzer
+from RefResolver import RefResolver
+
+PET = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "tag": {"$ref": "#/components/schemas/Tag"},
+    },
+}
+TAG = {"type": "object", "properties": {"id": {"type": "integer"}}}
+
+# Petstore layout: a shared request body named like the schema it wraps
+SPEC = {
+    "openapi": "3.0.0",
+    "paths": {
+        "/pets": {
+            "post": {
+                "requestBody": {"$ref": "#/components/requestBodies/Pet"},
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Pet"}
+                            }
+                        }
+                    }
+                },
+            }
+        }
+    },
+    "components": {
+        "requestBodies": {
+            "Pet": {
+                "content": {
+                    "application/json": {"schema": {"$ref": "#/components/schemas/Pet"}}
+                }
+            }
+        },
+        "schemas": {"Pet": PET, "Tag": TAG},
+    },
+}
+
+
+def test_shared_request_body_name_does_not_shadow_schema():
+    operation = SPEC["paths"]["/pets"]["post"]
+    schemas = RefResolver(SPEC).referenced_objects(
+        [operation["requestBody"], operation["responses"]]
+    )
+
+    assert schemas == {"Pet": PET, "Tag": TAG}
+
+
+def test_request_body_ref_is_followed_to_its_schemas():
+    operation = SPEC["paths"]["/pets"]["post"]
+    schemas = RefResolver(SPEC).referenced_objects([operation["requestBody"]])
+
+    assert list(schemas) == ["Pet", "Tag"]
+
+
+def test_fuzzer_builds_a_body_for_the_shared_name():
+    operation = SPEC["paths"]["/pets"]["post"]
+    schemas = RefResolver(SPEC).referenced_objects([operation["requestBody"]])
+    fuzzer = ACMEFuzzer()
+
+    assert fuzzer.resolve_schema({"$ref": "#/components/schemas/Pet"}, schemas) == PET
+    assert (
+        fuzzer.strategy_from_schema({"$ref": "#/components/schemas/Pet"}, schemas)
+        is not None
+    )